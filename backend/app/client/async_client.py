@@ -0,0 +1,205 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import contextvars
+import datetime
+import functools
+import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Optional
+
+from app.client.client_interface import ClientInferface
+from app.client.read_coalescing import read_coalescer
+from app.loop_monitor import event_loop_monitor
+from app.schemas.common import StatusResponse
+from app.schemas.configuration import Configuration
+from app.schemas.device import Device
+from app.schemas.device import Devices
+from app.schemas.insight import ImageAndInference
+from app.schemas.insight import ImageDirectories
+from app.schemas.insight import Inference
+
+logger = logging.getLogger(__name__)
+
+CLIENT_EXECUTOR_WORKERS = int(os.getenv("CLIENT_EXECUTOR_WORKERS", 16))
+
+# Dedicated to console calls, so that slow console requests cannot starve the
+# default thread pool used by FastAPI
+_executor = ThreadPoolExecutor(
+    max_workers=CLIENT_EXECUTOR_WORKERS, thread_name_prefix="console-client"
+)
+event_loop_monitor.watch_executor("console-client", _executor)
+
+
+class AsyncClient:
+    """Awaitable facade over a `ClientInferface`.
+
+    The generated console clients are blocking, so every call is run in a bounded
+    thread pool dedicated to console I/O, keeping the event loop free for the other
+    requests and the WebSockets. Context variables of the caller are propagated to
+    the worker thread. Clients exposing a `native` coroutine implementation (see
+    `OnlineConsoleClientV2Async`) are awaited directly instead.
+    """
+
+    def __init__(
+        self, client: ClientInferface, executor: ThreadPoolExecutor = _executor
+    ):
+        self.client = client
+        self._executor = executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable in the console client executor.
+
+        Args:
+            func (Callable[..., Any]): Blocking callable.
+            *args: Positional arguments of the callable.
+            **kwargs: Keyword arguments of the callable.
+
+        Returns:
+            Any: The value returned by the callable.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    async def _call(self, name: str, *args, **kwargs) -> Any:
+        native = getattr(self.client, "native", None)
+        if native is not None:
+            # Native async clients run the coroutine in their own event loop
+            coroutine = getattr(native, name)(*args, **kwargs)
+            return await asyncio.wrap_future(self.client.submit(coroutine))
+
+        func = getattr(self.client, name)
+        if asyncio.iscoroutinefunction(func):
+            # Client coroutines that perform blocking calls get their own event
+            # loop in the worker thread
+            return await self.run(lambda: asyncio.run(func(*args, **kwargs)))
+        return await self.run(func, *args, **kwargs)
+
+    async def _read(self, name: str, *args) -> Any:
+        # Identical concurrent reads share a single console request
+        return await read_coalescer.get(
+            (self.client, name, *args), lambda: self._call(name, *args)
+        )
+
+    async def reload_client(self):
+        try:
+            return await self._call("reload_client")
+        finally:
+            read_coalescer.invalidate(self.client)
+
+    async def get_devices(self) -> Devices:
+        return await self._read("get_devices")
+
+    async def get_device(self, device_id: str) -> Device:
+        return await self._read("get_device", device_id)
+
+    async def get_configuration(self, device_id: str) -> Configuration:
+        return await self._read("get_configuration", device_id)
+
+    async def update_configuration(
+        self, device_id: str, configuration: Configuration
+    ) -> StatusResponse:
+        try:
+            return await self._call(
+                "update_configuration",
+                device_id=device_id,
+                configuration=configuration,
+            )
+        finally:
+            read_coalescer.invalidate(self.client, device_id)
+
+    async def set_configuration(
+        self, device_id: str, configuration: Configuration
+    ) -> StatusResponse:
+        try:
+            return await self._call(
+                "set_configuration",
+                device_id=device_id,
+                configuration=configuration,
+            )
+        finally:
+            read_coalescer.invalidate(self.client, device_id)
+
+    async def get_direct_image(self, device_id: str) -> str:
+        return await self._call("get_direct_image", device_id)
+
+    async def get_latest_data(
+        self, device_id: str, get_image: bool = False, encode_image: bool = True
+    ) -> tuple[Optional[str | bytes], dict[str, str]]:
+        return await self._call(
+            "get_latest_data",
+            device_id,
+            get_image=get_image,
+            encode_image=encode_image,
+        )
+
+    async def start_upload_inference_data(
+        self, device_id: str, get_image: bool = False
+    ) -> StatusResponse:
+        try:
+            return await self._call(
+                "start_upload_inference_data", device_id, get_image=get_image
+            )
+        finally:
+            read_coalescer.invalidate(self.client, device_id)
+
+    async def stop_upload_inference_data(self, device_id: str) -> StatusResponse:
+        try:
+            return await self._call("stop_upload_inference_data", device_id)
+        finally:
+            read_coalescer.invalidate(self.client, device_id)
+
+    async def delete_device_data(self, device_id: str) -> StatusResponse:
+        return await self._call("delete_device_data", device_id)
+
+    async def get_image_directories(self, device_id: str) -> ImageDirectories:
+        return await self._call("get_image_directories", device_id)
+
+    async def get_images_and_inferences(
+        self, device_id: str, sub_directory_name: str
+    ) -> list[ImageAndInference]:
+        return await self._call(
+            "get_images_and_inferences", device_id, sub_directory_name
+        )
+
+    async def get_image_content(
+        self, device_id: str, sub_directory_name: str, timestamp: str
+    ) -> bytes:
+        return await self._call(
+            "get_image_content", device_id, sub_directory_name, timestamp
+        )
+
+    async def get_inferences(
+        self,
+        device_id: str,
+        from_datetime: datetime.datetime,
+        to_datetime: datetime.datetime,
+        order_by: str = "ASC",
+    ) -> list[Inference]:
+        return await self._call(
+            "get_inferences",
+            device_id,
+            from_datetime,
+            to_datetime,
+            order_by=order_by,
+        )
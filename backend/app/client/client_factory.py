@@ -13,17 +13,24 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
 import os
 from typing import Optional
 
+from app.client.async_client import AsyncClient
 from app.client.client_interface import ClientInferface
 from app.client.online_client_v1 import OnlineConsoleClientV1
 from app.client.online_client_v2 import OnlineConsoleClientV2
+from app.client.online_client_v2_async import OnlineConsoleClientV2Async
+
+logger = logging.getLogger(__name__)
 
 # Singleton instances
 _singleton_clients: dict[str, Optional[ClientInferface]] = {
     "ONLINE V1": None,
     "ONLINE V2": None,
+    "ONLINE V2 ASYNC": None,
 }
 
 
@@ -48,5 +55,51 @@ def get_api_client() -> ClientInferface:
             _singleton_clients[client_type] = OnlineConsoleClientV1()
         elif client_type == "ONLINE V2":
             _singleton_clients[client_type] = OnlineConsoleClientV2()
+        elif client_type == "ONLINE V2 ASYNC":
+            _singleton_clients[client_type] = OnlineConsoleClientV2Async()
 
     return _singleton_clients[client_type]
+
+
+def get_async_api_client() -> AsyncClient:
+    """
+    Get the singleton client wrapped in an awaitable facade, to be used from the
+    event loop.
+
+    Returns:
+        AsyncClient: Awaitable facade over the singleton client.
+    """
+    return AsyncClient(get_api_client())
+
+
+async def reload_api_clients():
+    """
+    Rebuild the connection of every client created so far, e.g. after the console
+    settings changed.
+
+    Each client swaps its connection in place, so the device pipelines using it
+    keep running. Errors of the clients other than the selected one are only
+    logged.
+    """
+    selected_client_type = os.getenv("CLIENT_TYPE")
+    for client_type, client in _singleton_clients.items():
+        if client is None:
+            continue
+        try:
+            await AsyncClient(client).reload_client()
+        except Exception as e:
+            if client_type == selected_client_type:
+                raise
+            logger.warning(f"Failed to reload the {client_type} client: {e}")
+
+
+async def close_api_clients():
+    """Close every client created so far, at shutdown."""
+    for client_type, client in _singleton_clients.items():
+        if client is None:
+            continue
+        try:
+            await asyncio.to_thread(client.close)
+        except Exception as e:
+            logger.warning(f"Failed to close the {client_type} client: {e}")
+        _singleton_clients[client_type] = None
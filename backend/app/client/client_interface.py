@@ -21,6 +21,7 @@ from typing import Generic
 from typing import Optional
 from typing import TypeVar
 
+from app.client.device_metadata_cache import DeviceMetadataCache
 from app.schemas.common import StatusResponse
 from app.schemas.configuration import Configuration
 from app.schemas.device import Device
@@ -38,11 +39,15 @@ class ClientInferface(ABC, Generic[Conf]):
 
     def __init__(self, timeout: int = None):
         self.timeout = timeout or int(os.getenv("API_TIMEOUT", 60))
+        self.metadata_cache = DeviceMetadataCache()
 
     @abstractmethod
     def reload_client(self):
         """Reloads API Client"""
 
+    def close(self):
+        """Release the resources of the client, e.g. at shutdown."""
+
     @abstractmethod
     def get_devices(self) -> Devices:
         """Retrieve all enrolled devices as a device list in Device format (List[str])
@@ -114,17 +119,37 @@ class ClientInferface(ABC, Generic[Conf]):
 
     @abstractmethod
     def get_latest_data(
-        self, device_id: str, get_image: bool = False
-    ) -> tuple[Optional[str], dict[str, str]]:
+        self, device_id: str, get_image: bool = False, encode_image: bool = True
+    ) -> tuple[Optional[str | bytes], dict[str, str]]:
         """Get the latest image and its inference result from the specified device.
 
         Args:
             device_id (str): Device ID
             get_image (bool): Whether to get the image or not
+            encode_image (bool): Whether to return the image as a Base64 string or as raw bytes
+
+        Returns:
+            tuple[str | bytes | None, dict[str, str]]: Tuple containing the latest image (if requested) and its inference result
+        """
+
+    def get_latest_inferences(self, device_ids: list[str]) -> dict[str, dict[str, str]]:
+        """Get the latest inference result of several devices.
+
+        Clients whose console can query several devices at once override it to
+        make a single request, the device pipelines then poll in batches.
+
+        Args:
+            device_ids (list[str]): Device IDs
 
         Returns:
-            tuple[str | None, dict[str, str]]: Tuple containing the latest image (if requested) as string and its inference result
+            dict[str, dict[str, str]]: Latest inference result of each device.
+                Overrides may leave out the devices without a result in the
+                response, to be queried with `get_latest_data`.
         """
+        return {
+            device_id: self.get_latest_data(device_id, get_image=False)[1]
+            for device_id in device_ids
+        }
 
     @abstractmethod
     def start_upload_inference_data(
@@ -192,6 +217,23 @@ class ClientInferface(ABC, Generic[Conf]):
                 - "inference" (dict): The associated inference data for the image.
         """
 
+    @abstractmethod
+    def get_image_content(
+        self, device_id: str, sub_directory_name: str, timestamp: str
+    ) -> bytes:
+        """
+        Download a single uploaded image of a specific device.
+
+        Args:
+            device_id (str): The ID of the device that uploaded the image.
+            sub_directory_name (str): The name of the subdirectory containing the image.
+            timestamp (str): The timestamp of the image in numeric format.
+                (e.g., '20250101000000000', corresponding to 'YYYYMMDDHHMMSSmmm').
+
+        Returns:
+            bytes: The content of the image file.
+        """
+
     @abstractmethod
     def get_inferences(
         self,
@@ -0,0 +1,125 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+from collections.abc import Awaitable
+from collections.abc import Callable
+from threading import Lock
+from time import monotonic
+from typing import Any
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEVICE_METADATA_TTL = float(os.getenv("DEVICE_METADATA_TTL", 300))
+
+
+class DeviceMetadataCache:
+    """Per-device TTL cache of console metadata that rarely changes,
+    such as module ids and device configurations.
+
+    Entries expire after `ttl` seconds and must be invalidated explicitly by the
+    operations that modify them. A `ttl` of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: float = DEVICE_METADATA_TTL):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries: dict[str, dict[str, tuple[float, Any]]] = {}
+        # Invalidations of all the devices (None), of a device (device id) and of
+        # a value of a device ((device id, name)), to detect those during a load
+        self._generations: dict[Any, int] = {}
+
+    def _generation(self, device_id: str, name: str) -> tuple[int, int, int]:
+        return (
+            self._generations.get(None, 0),
+            self._generations.get(device_id, 0),
+            self._generations.get((device_id, name), 0),
+        )
+
+    def _lookup(self, device_id: str, name: str) -> tuple[bool, Any, tuple]:
+        with self._lock:
+            expiry, value = self._entries.get(device_id, {}).get(name, (0, None))
+            return monotonic() < expiry, value, self._generation(device_id, name)
+
+    def _store(self, device_id: str, name: str, value: Any, generation: tuple):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            # A value loaded before an invalidation may already be outdated
+            if self._generation(device_id, name) == generation:
+                self._entries.setdefault(device_id, {})[name] = (
+                    monotonic() + self.ttl,
+                    value,
+                )
+
+    def get(self, device_id: str, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value, calling `loader` to refresh it when missing or expired.
+
+        Args:
+            device_id (str): Device the value belongs to.
+            name (str): Name of the value (e.g. "module_id").
+            loader (Callable[[], Any]): Retrieves the value from the console.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        cached, value, generation = self._lookup(device_id, name)
+        if cached:
+            return value
+
+        value = loader()
+        self._store(device_id, name, value, generation)
+        return value
+
+    async def get_async(
+        self, device_id: str, name: str, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Same as `get`, for loaders that are coroutine functions."""
+        cached, value, generation = self._lookup(device_id, name)
+        if cached:
+            return value
+
+        value = await loader()
+        self._store(device_id, name, value, generation)
+        return value
+
+    def invalidate(
+        self, device_id: Optional[str] = None, name: Optional[str] = None
+    ) -> None:
+        """
+        Drop cached values.
+
+        Args:
+            device_id (Optional[str]): Device to invalidate. All devices if None.
+            name (Optional[str]): Value to invalidate. All values of the device(s) if None.
+        """
+        logger.debug(f"Invalidating metadata cache: device={device_id}, name={name}")
+        with self._lock:
+            if device_id is None:
+                key = None
+            elif name is None:
+                key = device_id
+            else:
+                key = (device_id, name)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            device_ids = list(self._entries) if device_id is None else [device_id]
+            for _device_id in device_ids:
+                if name is None:
+                    self._entries.pop(_device_id, None)
+                else:
+                    self._entries.get(_device_id, {}).pop(name, None)
@@ -0,0 +1,122 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+
+import aiohttp
+import requests
+from app.utils.frame_trace import current_frame_trace
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DOWNLOAD_POOL_SIZE = int(os.getenv("IMAGE_DOWNLOAD_POOL_SIZE", 32))
+IMAGE_DOWNLOAD_MAX_BYTES = int(os.getenv("IMAGE_DOWNLOAD_MAX_BYTES", 20 * 1024 * 1024))
+_CHUNK_SIZE = 64 * 1024
+
+# Shared by all clients and threads so that connections to the blob storage are
+# kept alive and reused between frames
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=IMAGE_DOWNLOAD_POOL_SIZE,
+        pool_maxsize=IMAGE_DOWNLOAD_POOL_SIZE,
+    ),
+)
+
+
+def download_image(
+    url: str, timeout: int, max_bytes: int = IMAGE_DOWNLOAD_MAX_BYTES
+) -> bytes:
+    """Download an image (e.g. from a SAS URL) into memory.
+
+    Args:
+        url (str): URL of the image
+        timeout (int): Request timeout in seconds
+        max_bytes (int): Maximum accepted image size in bytes
+
+    Returns:
+        bytes: Content of the image
+    """
+    trace = current_frame_trace.get()
+    if trace is not None:
+        trace.stamp("download_start")
+    try:
+        with _session.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+
+            content_length = int(response.headers.get("Content-Length", 0))
+            if content_length > max_bytes:
+                raise ValueError(
+                    f"Image size {content_length} exceeds the limit of {max_bytes} bytes"
+                )
+
+            content = bytearray()
+            for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                content += chunk
+                if len(content) > max_bytes:
+                    raise ValueError(f"Image exceeds the limit of {max_bytes} bytes")
+            if trace is not None:
+                trace.stamp("image_download")
+            return bytes(content)
+    except (requests.exceptions.RequestException, ValueError) as error:
+        logger.error(f"Failed to download image: {error}")
+        raise Exception(f"Failed to download image: {error}")
+
+
+async def download_image_async(
+    session: aiohttp.ClientSession,
+    url: str,
+    timeout: int,
+    max_bytes: int = IMAGE_DOWNLOAD_MAX_BYTES,
+) -> bytes:
+    """Coroutine version of `download_image`, using the given aiohttp session.
+
+    Args:
+        session (aiohttp.ClientSession): Session whose connection pool is used
+        url (str): URL of the image
+        timeout (int): Request timeout in seconds
+        max_bytes (int): Maximum accepted image size in bytes
+
+    Returns:
+        bytes: Content of the image
+    """
+    trace = current_frame_trace.get()
+    if trace is not None:
+        trace.stamp("download_start")
+    try:
+        async with session.get(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            response.raise_for_status()
+
+            if (response.content_length or 0) > max_bytes:
+                raise ValueError(
+                    f"Image size {response.content_length} exceeds the limit of {max_bytes} bytes"
+                )
+
+            content = bytearray()
+            async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                content += chunk
+                if len(content) > max_bytes:
+                    raise ValueError(f"Image exceeds the limit of {max_bytes} bytes")
+            if trace is not None:
+                trace.stamp("image_download")
+            return bytes(content)
+    except (aiohttp.ClientError, TimeoutError, ValueError) as error:
+        logger.error(f"Failed to download image: {error}")
+        raise Exception(f"Failed to download image: {error}")
@@ -16,20 +16,26 @@
 import datetime
 import json
 import logging
+from base64 import b64decode
 from base64 import b64encode
-from time import time
+from threading import Lock
 from typing import Optional
 
 from app.client.client_interface import ClientInferface
 from app.client.client_interface import Device
 from app.client.client_interface import Devices
 from app.client.client_interface import StatusResponse
+from app.client.image_download import download_image
+from app.client.request_scheduler import with_request_scheduling
+from app.client.resilience import with_resilience
 from app.config.get_console_settings import get_console_settings
 from app.schemas.configuration import ConfigurationV1
 from app.schemas.insight import ImageAndInference
 from app.schemas.insight import ImageDirectories
 from app.schemas.insight import Inference
-from app.utils.auth import get_token
+from app.utils.auth import TokenManager
+from app.utils.logger import rate_limited
+from app.utils.polling import wait_until
 from console_api_client import ApiClient
 from console_api_client import ApiException
 from console_api_client import CommandParameterFileApi
@@ -46,6 +52,8 @@ from urllib3.exceptions import ReadTimeoutError
 
 logger = logging.getLogger(__name__)
 
+ConsoleApiClient = with_resilience(with_request_scheduling(ApiClient))
+
 
 def get_last_inference_id(response: list[GetInferenceResults200ResponseInner]) -> str:
     return response[-1].id if len(response) != 0 else ""
@@ -55,15 +63,17 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
 
     def __init__(self, timeout=None):
         super().__init__(timeout)
-        self.__api_client = None
-        self.token_expiry = time()
+        # API client and the token manager renewing its token, swapped together
+        self.__connection: Optional[tuple[ApiClient, TokenManager]] = None
+        self.__client_lock = Lock()
 
     def _get_client(self):
         """
         Get autogenerated API Client to interact with Online Console
 
         Returns:
-            ApiClient: Python API Client
+            tuple[ApiClient, TokenManager]: Python API Client and the token manager
+                renewing its access token
         """
         try:
             logger.debug("Attempting to create Online Console API client.")
@@ -73,23 +83,22 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                 client_secret,
                 portal_authorization_endpoint,
             ) = get_console_settings()
-            access_token, expires_in = get_token(
+            token_manager = TokenManager(
                 client_id=client_id,
                 client_secret=client_secret,
                 portal_authorization_endpoint=portal_authorization_endpoint,
             )
-
-            self.token_expiry = time() + expires_in - 10  # Add a safety buffer
+            access_token = token_manager.get()
 
             configuration = Configuration(host=console_endpoint)
-            api_client = ApiClient(
+            api_client = ConsoleApiClient(
                 configuration=configuration,
                 header_name="Authorization",
                 header_value=f"Bearer {access_token}",
             )
             logger.info("Online Console API client successfully created.")
 
-            return api_client
+            return api_client, token_manager
         except Exception as e:
             logger.error(f"Failed to create Online Console API client: {e}")
             raise HTTPException(
@@ -97,14 +106,27 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             )
 
     def get_client(self):
-        if self.__api_client is None or time() >= self.token_expiry:
-            logger.info("Initializing Online Console API client connection.")
-            self.__api_client = self._get_client()
-        return self.__api_client
+        connection = self.__connection
+        if connection is None:
+            with self.__client_lock:
+                if self.__connection is None:
+                    logger.info("Initializing Online Console API client connection.")
+                    self.__connection = self._get_client()
+                connection = self.__connection
+        api_client, token_manager = connection
+        # The token is renewed in place, keeping the connection pool of the client
+        api_client.set_default_header("Authorization", f"Bearer {token_manager.get()}")
+        return api_client
 
     def reload_client(self):
         logger.info("Reloading Online Console API client connection.")
-        self.__api_client = self._get_client()
+        with self.__client_lock:
+            previous_connection = self.__connection
+            # The previous connection is kept if the new one cannot be created
+            self.__connection = self._get_client()
+        if previous_connection is not None:
+            previous_connection[1].close()
+        self.metadata_cache.invalidate()
 
     def get_devices(self) -> Devices:
         logger.debug("Fetching device list from Online Console.")
@@ -176,6 +198,11 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             raise Exception(f"Unexpected Error during processing: {error}")
 
     def get_configuration(self, device_id: str) -> ConfigurationV1:
+        return self.metadata_cache.get(
+            device_id, "configuration", lambda: self._fetch_configuration(device_id)
+        )
+
+    def _fetch_configuration(self, device_id: str) -> ConfigurationV1:
         try:
             api_instance = CommandParameterFileApi(self.get_client())
             response = api_instance.get_command_parameter_file(
@@ -236,11 +263,15 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                 "parameter": b64encode(json_str.encode("utf-8")).decode("utf-8"),
                 "comment": "",
             }
-            response = api_instance.update_command_parameter_file(
-                file_name=configuration.file_name,
-                update_command_parameter_file_body=payload,
-                _request_timeout=self.timeout,
-            )
+            try:
+                response = api_instance.update_command_parameter_file(
+                    file_name=configuration.file_name,
+                    update_command_parameter_file_body=payload,
+                    _request_timeout=self.timeout,
+                )
+            finally:
+                # The file may be bound to several devices
+                self.metadata_cache.invalidate(name="configuration")
             logger.info(
                 f"Successfully updated configuration file: {configuration.file_name}."
             )
@@ -334,6 +365,7 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             )
             raise Exception(f"Transport error occurred: {str(transport_error)}")
 
+        self.metadata_cache.invalidate(device_id, "configuration")
         logger.info(
             f"Successfully bound file '{file_name}' to device ID '{device_id}'."
         )
@@ -364,10 +396,12 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             raise Exception(f"Transport error occurred: {str(transport_error)}")
 
     def get_latest_data(
-        self, device_id: str, get_image: bool = False
-    ) -> tuple[Optional[str], dict[str, str]]:
+        self, device_id: str, get_image: bool = False, encode_image: bool = True
+    ) -> tuple[Optional[str | bytes], dict[str, str]]:
         logger.debug(
-            f"Fetching latest data for device ID '{device_id}'. Get image: {get_image}"
+            "Fetching latest data for device ID '%s'. Get image: %s",
+            device_id,
+            get_image,
         )
         try:
             insight_api = InsightApi(self.get_client())
@@ -383,6 +417,8 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                     _request_timeout=self.timeout,
                 )
                 image_content = response.images[0].contents
+                if not encode_image:
+                    image_content = b64decode(image_content)
 
                 response = insight_api.get_inference_results(
                     device_id=device_id,
@@ -408,8 +444,11 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                     "timestamp": response[0].inference_result.inferences[0].t,
                     "content": response[0].inference_result.inferences[0].o,
                 }
+            # Logged at every poll of every device
             logger.info(
-                f"Successfully retrieved image and inference data for device ID '{device_id}'"
+                "Successfully retrieved image and inference data for device ID '%s'",
+                device_id,
+                extra=rate_limited(device_id),
             )
             return image_content, inference
         except ApiException as api_error:
@@ -434,7 +473,6 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
         try:
             device_api = DeviceCommandApi(self.get_client())
             insight_api = InsightApi(self.get_client())
-            start_time = time()
             time_out_secs = self.timeout
             if get_image:
                 response = insight_api.get_image_directories(
@@ -444,13 +482,18 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                 response = device_api.start_upload_inference_result(
                     device_id, _request_timeout=self.timeout
                 )
-                while (
-                    insight_api.get_image_directories(device_id)[0].devices[0].image
-                    == previous_directories
-                ):
-                    logger.info("Waiting for the creation of new image directory...")
-                    if time() - start_time > time_out_secs:
-                        raise Exception("Timeout while waiting for device to start.")
+
+                def _has_new_directory() -> bool:
+                    directories = insight_api.get_image_directories(
+                        device_id, _request_timeout=self.timeout
+                    )
+                    return directories[0].devices[0].image != previous_directories
+
+                wait_until(
+                    _has_new_directory,
+                    timeout=time_out_secs,
+                    message="Waiting for the creation of new image directory...",
+                )
 
                 logger.debug(
                     f"[start_upload_inference_data] Image directory created, status response: {response.result}"
@@ -465,16 +508,20 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
                 response = device_api.start_upload_inference_result(
                     device_id, _request_timeout=self.timeout
                 )
-                while last_inference_id == get_last_inference_id(
-                    insight_api.get_inference_results(
+
+                def _has_new_inference() -> bool:
+                    results = insight_api.get_inference_results(
                         device_id,
                         number_of_inferenceresults=1,
                         _request_timeout=self.timeout,
                     )
-                ):
-                    logger.info("Waiting for the device to start...")
-                    if time() - start_time > time_out_secs:
-                        raise Exception("Timeout while waiting for device to start.")
+                    return get_last_inference_id(results) != last_inference_id
+
+                wait_until(
+                    _has_new_inference,
+                    timeout=time_out_secs,
+                    message="Waiting for the device to start...",
+                )
                 logger.debug(
                     f"[start_upload_inference_data] Device started, status response: {response.result}"
                 )
@@ -675,6 +722,35 @@ class OnlineConsoleClientV1(ClientInferface[ConfigurationV1]):
             logger.error(error_message, exc_info=True)
             raise Exception(error_message)
 
+    def get_image_content(
+        self, device_id: str, sub_directory_name: str, timestamp: str
+    ) -> bytes:
+        logger.debug(
+            f"Fetching image {timestamp} of directory '{sub_directory_name}' for device ID '{device_id}'."
+        )
+        try:
+            response = InsightApi(self.get_client()).get_images_stable(
+                device_id=device_id,
+                sub_directory_name=sub_directory_name,
+                name_starts_with=timestamp,
+                _request_timeout=self.timeout,
+            )
+        except ApiException as api_error:
+            error_message = f"API error while retrieving image {timestamp} from device id {device_id} : {api_error}"
+            logger.error(error_message, exc_info=True)
+            raise Exception(error_message)
+        except (MaxRetryError, ReadTimeoutError) as transport_error:
+            logger.error(
+                f"Transport Error while retrieving image {timestamp} from device id {device_id}: {transport_error}"
+            )
+            raise Exception(f"Transport error occurred: {str(transport_error)}")
+
+        if not response.data:
+            raise Exception(
+                f"Image {timestamp} not found in directory {sub_directory_name}"
+            )
+        return download_image(response.data[0].sas_url, timeout=self.timeout)
+
     def get_inferences(
         self,
         device_id: str,
@@ -16,14 +16,16 @@
 import base64
 import datetime
 import logging
-import urllib
-from tempfile import TemporaryDirectory
+import os
+from threading import Lock
 from time import sleep
-from time import time
 from typing import Optional
 
 from app.client.client_interface import ClientInferface
 from app.client.client_interface import StatusResponse
+from app.client.image_download import download_image
+from app.client.request_scheduler import with_request_scheduling
+from app.client.resilience import with_resilience
 from app.config.get_console_settings import get_console_settings
 from app.schemas.configuration import ConfigurationV2
 from app.schemas.device import Device
@@ -31,7 +33,9 @@ from app.schemas.device import Devices
 from app.schemas.insight import ImageAndInference
 from app.schemas.insight import ImageDirectories
 from app.schemas.insight import Inference
-from app.utils.auth import get_token
+from app.utils.auth import TokenManager
+from app.utils.logger import rate_limited
+from app.utils.polling import wait_until
 from app.utils.timestamp import convert_iso_timestamp_to_numeric
 from app.utils.timestamp import convert_numeric_timestamp_to_iso
 from console_v2_api_client import ApiClient
@@ -64,6 +68,16 @@ from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 
+ConsoleApiClient = with_resilience(with_request_scheduling(ApiClient))
+
+# Maximum number of devices queried by a single latest inference request
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", 10))
+# Results requested per device, so that busy devices do not crowd out the others
+INFERENCE_BATCH_DEPTH = 4
+# Pages of results read at most until every device of a batch has a result, devices
+# without any recent result would otherwise page through the whole history
+INFERENCE_BATCH_MAX_PAGES = int(os.getenv("INFERENCE_BATCH_MAX_PAGES", 5))
+
 
 def _remove_empty_entries(dictionary: any) -> any:
     if not isinstance(dictionary, dict):
@@ -76,20 +90,80 @@ def _process_configuration_for_sending(configuration: ConfigurationV2) -> dict:
     return _remove_empty_entries(json_configuration)
 
 
+def _latest_inference_by_device(
+    response: InferenceresultsGet200Response,
+) -> dict[str, dict[str, str]]:
+    """Latest inference of each device in a response sorted from newest to oldest."""
+    latest = {}
+    for result in response.inferences or []:
+        if result.device_id in latest or not result.inferences:
+            continue
+        latest[result.device_id] = {
+            "timestamp": convert_iso_timestamp_to_numeric(result.inferences[0].t),
+            "content": result.inferences[0].o,
+        }
+    return latest
+
+
+def _check_input_tensor_path_follows_convention(
+    folder_path: str, device_id: str
+) -> bool:
+    folder_path_elements = folder_path.split("/")
+    if len(folder_path_elements) != 3:
+        return False
+
+    folder_path_device_id = folder_path_elements[0]
+    folder_path_image_element = folder_path_elements[1]
+    folder_path_subfolder = folder_path_elements[2]
+
+    if (
+        folder_path_device_id != device_id
+        or folder_path_image_element != "image"
+        or folder_path_subfolder == ""
+    ):
+        return False
+
+    return True
+
+
+def _validate_and_adapt_input_tensor_path(folder_path: str, device_id: str) -> str:
+    curr_date = datetime.datetime.now().strftime("%Y%m%d-%H%M%S%f")
+
+    if folder_path is None or folder_path == "":
+        return f"{device_id}/image/{curr_date}"
+
+    folder_path_elements = folder_path.split("/")
+    if not _check_input_tensor_path_follows_convention(folder_path, device_id):
+        # Verification that the images path follows the expected format of {device_id}/image/{subfolder}
+        return f"{device_id}/image/{curr_date}"
+    else:
+        prev_folder_parent = "/".join(folder_path_elements[:-1])
+        try:
+            datetime.datetime.strptime(folder_path.split("/")[-1], "%Y%m%d-%H%M%S%f")
+
+            # If the image subfolder is a date, replace it with the current one
+            return f"{prev_folder_parent}/{curr_date}"
+        except ValueError:
+            # Otherwise, return the path as it is
+            return folder_path
+
+
 class OnlineConsoleClientV2(ClientInferface):
     NUM_RETRIES = 10
 
     def __init__(self, timeout=None):
         super().__init__(timeout)
-        self.__api_client = None
-        self.token_expiry = time()
+        # API client and the token manager renewing its token, swapped together
+        self.__connection: Optional[tuple[ApiClient, TokenManager]] = None
+        self.__client_lock = Lock()
 
     def _get_client(self):
         """
         Get autogenerated API Client to interact with Online Console v2
 
         Returns:
-            ApiClient: Python API Client
+            tuple[ApiClient, TokenManager]: Python API Client and the token manager
+                renewing its access token
         """
         try:
             logger.debug("Attempting to create Online Console API v2 client.")
@@ -99,23 +173,22 @@ class OnlineConsoleClientV2(ClientInferface):
                 client_secret,
                 portal_authorization_endpoint,
             ) = get_console_settings()
-            access_token, expires_in = get_token(
+            token_manager = TokenManager(
                 client_id=client_id,
                 client_secret=client_secret,
                 portal_authorization_endpoint=portal_authorization_endpoint,
             )
-
-            self.token_expiry = time() + expires_in - 10  # Add a safety buffer
+            access_token = token_manager.get()
 
             configuration = Configuration(host=console_endpoint)
-            api_client = ApiClient(
+            api_client = ConsoleApiClient(
                 configuration=configuration,
                 header_name="Authorization",
                 header_value=f"Bearer {access_token}",
             )
             logger.info("Online Console API v2 client successfully created.")
 
-            return api_client
+            return api_client, token_manager
         except Exception as e:
             logger.error(
                 f"Failed to create Online Console API v2 client: {e}", exc_info=True
@@ -125,14 +198,27 @@ class OnlineConsoleClientV2(ClientInferface):
             )
 
     def get_client(self):
-        if self.__api_client is None or time() >= self.token_expiry:
-            logger.info("Initializing Online Console API v2 client connection.")
-            self.__api_client = self._get_client()
-        return self.__api_client
+        connection = self.__connection
+        if connection is None:
+            with self.__client_lock:
+                if self.__connection is None:
+                    logger.info("Initializing Online Console API v2 client connection.")
+                    self.__connection = self._get_client()
+                connection = self.__connection
+        api_client, token_manager = connection
+        # The token is renewed in place, keeping the connection pool of the client
+        api_client.set_default_header("Authorization", f"Bearer {token_manager.get()}")
+        return api_client
 
     def reload_client(self):
         logger.info("Reloading Online Console API client connection.")
-        self.__api_client = self._get_client()
+        with self.__client_lock:
+            previous_connection = self.__connection
+            # The previous connection is kept if the new one cannot be created
+            self.__connection = self._get_client()
+        if previous_connection is not None:
+            previous_connection[1].close()
+        self.metadata_cache.invalidate()
 
     def get_devices(self) -> Devices:
         logger.debug("Fetching device list from Online Console.")
@@ -208,6 +294,11 @@ class OnlineConsoleClientV2(ClientInferface):
             raise Exception(f"Unexpected Error during processing: {error}")
 
     def _get_module_id_from_device(self, device_id: str) -> str:
+        return self.metadata_cache.get(
+            device_id, "module_id", lambda: self._fetch_module_id(device_id)
+        )
+
+    def _fetch_module_id(self, device_id: str) -> str:
         manage_device_api: ManageDevicesApi = ManageDevicesApi(self.get_client())
 
         try:
@@ -225,6 +316,11 @@ class OnlineConsoleClientV2(ClientInferface):
         return device_info.modules[0].module_id
 
     def get_configuration(self, device_id: str) -> ConfigurationV2:
+        return self.metadata_cache.get(
+            device_id, "configuration", lambda: self._fetch_configuration(device_id)
+        )
+
+    def _fetch_configuration(self, device_id: str) -> ConfigurationV2:
         module_id: str = self._get_module_id_from_device(device_id=device_id)
 
         device_command_api: DeviceCommandApi = DeviceCommandApi(self.get_client())
@@ -262,16 +358,19 @@ class OnlineConsoleClientV2(ClientInferface):
 
         json_configuration = _process_configuration_for_sending(configuration)
 
-        return StatusResponse(
-            status=device_command_api.update_module_configuration(
-                device_id=device_id,
-                module_id=module_id,
-                update_configuration_json_body=UpdateConfigurationJsonBody(
-                    configuration=json_configuration
-                ),
-                _request_timeout=self.timeout,
-            ).result
-        )
+        try:
+            return StatusResponse(
+                status=device_command_api.update_module_configuration(
+                    device_id=device_id,
+                    module_id=module_id,
+                    update_configuration_json_body=UpdateConfigurationJsonBody(
+                        configuration=json_configuration
+                    ),
+                    _request_timeout=self.timeout,
+                ).result
+            )
+        finally:
+            self.metadata_cache.invalidate(device_id, "configuration")
 
     async def set_configuration(
         self, device_id: str, configuration: ConfigurationV2
@@ -319,10 +418,12 @@ class OnlineConsoleClientV2(ClientInferface):
         return image
 
     def get_latest_data(
-        self, device_id: str, get_image: bool = False
-    ) -> tuple[Optional[str], dict[str, str]]:
+        self, device_id: str, get_image: bool = False, encode_image: bool = True
+    ) -> tuple[Optional[str | bytes], dict[str, str]]:
         logger.debug(
-            f"Fetching latest data for device ID '{device_id}'. Get image: {get_image}"
+            "Fetching latest data for device ID '%s'. Get image: %s",
+            device_id,
+            get_image,
         )
         try:
             insight_api = InsightApi(self.get_client())
@@ -342,7 +443,7 @@ class OnlineConsoleClientV2(ClientInferface):
                     "content": response.inferences[0].inferences[0].o,
                 }
 
-            image_content: str | None = None
+            image_content: str | bytes | None = None
             if get_image:
                 image_name = inference["timestamp"]
 
@@ -368,18 +469,21 @@ class OnlineConsoleClientV2(ClientInferface):
                     sleep(0.1)
 
                 if image_url is None:
+                    # The input tensor path may have changed since it was cached
+                    self.metadata_cache.invalidate(device_id, "configuration")
                     raise Exception(
                         f"Image {image_name} not found in directory {subdirectory_name}"
                     )
 
-                with TemporaryDirectory() as tmpdir_path:
-                    image_filepath: str = tmpdir_path + f"/{image_name}.png"
-                    urllib.request.urlretrieve(image_url, image_filepath)
-                    with open(image_filepath, "rb") as f:
-                        image_content = base64.b64encode(f.read()).decode("utf-8")
+                image_content = download_image(image_url, timeout=self.timeout)
+                if encode_image:
+                    image_content = base64.b64encode(image_content).decode("utf-8")
 
+            # Logged at every poll of every device
             logger.info(
-                f"Successfully retrieved image and inference data for device ID '{device_id}'"
+                "Successfully retrieved image and inference data for device ID '%s'",
+                device_id,
+                extra=rate_limited(device_id),
             )
             return image_content, inference
         except ApiException as api_error:
@@ -391,6 +495,43 @@ class OnlineConsoleClientV2(ClientInferface):
                 f"API error while retrieving data from device id {device_id}: {api_error}"
             )
 
+    def get_latest_inferences(self, device_ids: list[str]) -> dict[str, dict[str, str]]:
+        logger.debug("Fetching latest inferences of %d devices.", len(device_ids))
+        latest = {}
+        try:
+            insight_api = InsightApi(self.get_client())
+            for start in range(0, len(device_ids), INFERENCE_BATCH_SIZE):
+                batch = device_ids[start : start + INFERENCE_BATCH_SIZE]
+                continuation_token = None
+                for _ in range(INFERENCE_BATCH_MAX_PAGES):
+                    response: InferenceresultsGet200Response = (
+                        insight_api.inferenceresults_get(
+                            devices=batch,
+                            limit=len(batch) * INFERENCE_BATCH_DEPTH,
+                            starting_after=continuation_token,
+                            _request_timeout=self.timeout,
+                        )
+                    )
+                    # Pages go from newest to oldest, the first result wins
+                    for device_id, inference in _latest_inference_by_device(
+                        response
+                    ).items():
+                        latest.setdefault(device_id, inference)
+                    continuation_token = response.continuation_token
+                    if not continuation_token or all(
+                        device_id in latest for device_id in batch
+                    ):
+                        break
+        except ApiException as api_error:
+            logger.error(
+                f"API error while retrieving latest inferences: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API error while retrieving latest inferences: {api_error}"
+            )
+        return latest
+
     def _update_process_state(
         self, _device_id: str, _module_id: str, _process_state: int
     ) -> UpdateDeviceConfiguration200Response:
@@ -400,59 +541,17 @@ class OnlineConsoleClientV2(ClientInferface):
             "edge_app": {"common_settings": {"process_state": _process_state}}
         }
 
-        return device_command_api.update_module_configuration(
-            device_id=_device_id,
-            module_id=_module_id,
-            update_configuration_json_body=UpdateConfigurationJsonBody(
-                configuration=configuration
-            ),
-            _request_timeout=self.timeout,
-        )
-
-    def _check_input_tensor_path_follows_convention(
-        self, folder_path: str, device_id: str
-    ) -> bool:
-        folder_path_elements = folder_path.split("/")
-        if len(folder_path_elements) != 3:
-            return False
-
-        folder_path_device_id = folder_path_elements[0]
-        folder_path_image_element = folder_path_elements[1]
-        folder_path_subfolder = folder_path_elements[2]
-
-        if (
-            folder_path_device_id != device_id
-            or folder_path_image_element != "image"
-            or folder_path_subfolder == ""
-        ):
-            return False
-
-        return True
-
-    def _validate_and_adapt_input_tensor_path(
-        self, folder_path: str, device_id: str
-    ) -> str:
-        curr_date = datetime.datetime.now().strftime("%Y%m%d-%H%M%S%f")
-
-        if folder_path is None or folder_path == "":
-            return f"{device_id}/image/{curr_date}"
-
-        folder_path_elements = folder_path.split("/")
-        if not self._check_input_tensor_path_follows_convention(folder_path, device_id):
-            # Verification that the images path follows the expected format of {device_id}/image/{subfolder}
-            return f"{device_id}/image/{curr_date}"
-        else:
-            prev_folder_parent = "/".join(folder_path_elements[:-1])
-            try:
-                datetime.datetime.strptime(
-                    folder_path.split("/")[-1], "%Y%m%d-%H%M%S%f"
-                )
-
-                # If the image subfolder is a date, replace it with the current one
-                return f"{prev_folder_parent}/{curr_date}"
-            except ValueError:
-                # Otherwise, return the path as it is
-                return folder_path
+        try:
+            return device_command_api.update_module_configuration(
+                device_id=_device_id,
+                module_id=_module_id,
+                update_configuration_json_body=UpdateConfigurationJsonBody(
+                    configuration=configuration
+                ),
+                _request_timeout=self.timeout,
+            )
+        finally:
+            self.metadata_cache.invalidate(_device_id, "configuration")
 
     def start_upload_inference_data(
         self, device_id: str, get_image: bool = False
@@ -462,12 +561,7 @@ class OnlineConsoleClientV2(ClientInferface):
             f"Starting upload inference data for device ID '{device_id}'. Get image: {get_image}"
         )
         try:
-            module_id: str = (
-                ManageDevicesApi(self.get_client())
-                .get_device(device_id=device_id)
-                .modules[0]
-                .module_id
-            )
+            module_id: str = self._get_module_id_from_device(device_id=device_id)
 
             # Getting current configuration to be updated
             device_command_api: DeviceCommandApi = DeviceCommandApi(self.get_client())
@@ -477,7 +571,7 @@ class OnlineConsoleClientV2(ClientInferface):
                 prev_folder = (
                     prev_configuration.edge_app.common_settings.port_settings.input_tensor.path
                 )
-                new_inference_folder = self._validate_and_adapt_input_tensor_path(
+                new_inference_folder = _validate_and_adapt_input_tensor_path(
                     prev_folder, device_id=device_id
                 )
 
@@ -506,37 +600,35 @@ class OnlineConsoleClientV2(ClientInferface):
             # Start inference
             configuration["edge_app"]["common_settings"]["process_state"] = 2
 
-            response = device_command_api.update_module_configuration(
-                device_id=device_id,
-                module_id=module_id,
-                update_configuration_json_body=UpdateConfigurationJsonBody(
-                    configuration=configuration
-                ),
-                _request_timeout=self.timeout,
-            )
+            try:
+                response = device_command_api.update_module_configuration(
+                    device_id=device_id,
+                    module_id=module_id,
+                    update_configuration_json_body=UpdateConfigurationJsonBody(
+                        configuration=configuration
+                    ),
+                    _request_timeout=self.timeout,
+                )
+            finally:
+                self.metadata_cache.invalidate(device_id, "configuration")
 
             insight_api = InsightApi(self.get_client())
-            latest_inference_id: str = (
-                insight_api.inferenceresults_get(
-                    devices=[device_id], limit=1, _request_timeout=self.timeout
-                )
-                .inferences[0]
-                .id
-            )
 
-            start_time = time()
-            time_out_secs = 60
-            while (
-                latest_inference_id
-                == insight_api.inferenceresults_get(
-                    devices=[device_id], limit=1, _request_timeout=self.timeout
+            def _get_latest_inference_id() -> str:
+                return (
+                    insight_api.inferenceresults_get(
+                        devices=[device_id], limit=1, _request_timeout=self.timeout
+                    )
+                    .inferences[0]
+                    .id
                 )
-                .inferences[0]
-                .id
-            ):
-                logger.info("Waiting for the device to start...")
-                if time() - start_time > time_out_secs:
-                    raise Exception("Timeout while waiting for device to start.")
+
+            latest_inference_id = _get_latest_inference_id()
+            wait_until(
+                lambda: _get_latest_inference_id() != latest_inference_id,
+                timeout=60,
+                message="Waiting for the device to start...",
+            )
 
             logger.debug(
                 f"[start_upload_inference_data] Device started, status response: {response.result}"
@@ -554,14 +646,9 @@ class OnlineConsoleClientV2(ClientInferface):
     def stop_upload_inference_data(self, device_id: str) -> StatusResponse:
         logger.debug(f"Stopping upload inference data for device ID '{device_id}'.")
         try:
-            manage_devices_api = ManageDevicesApi(self.get_client())
-            device_info: DeviceConsoleV2 = manage_devices_api.get_device(
-                device_id=device_id
-            )
-
             response = self._update_process_state(
                 _device_id=device_id,
-                _module_id=device_info.modules[0].module_id,
+                _module_id=self._get_module_id_from_device(device_id=device_id),
                 _process_state=1,
             )
             logger.info(
@@ -743,6 +830,30 @@ class OnlineConsoleClientV2(ClientInferface):
             logger.error(error_message, exc_info=True)
             raise Exception(error_message)
 
+    def get_image_content(
+        self, device_id: str, sub_directory_name: str, timestamp: str
+    ) -> bytes:
+        logger.debug(
+            f"Fetching image {timestamp} of directory '{sub_directory_name}' for device ID '{device_id}'."
+        )
+        try:
+            response = InsightApi(self.get_client()).get_images(
+                device_id=device_id,
+                sub_directory_name=sub_directory_name,
+                name_starts_with=timestamp,
+                _request_timeout=self.timeout,
+            )
+        except ApiException as api_error:
+            error_message = f"API error while retrieving image {timestamp} from device id {device_id} : {api_error}"
+            logger.error(error_message, exc_info=True)
+            raise Exception(error_message)
+
+        if not response.data:
+            raise Exception(
+                f"Image {timestamp} not found in directory {sub_directory_name}"
+            )
+        return download_image(response.data[0].sas_url, timeout=self.timeout)
+
     def get_inferences(
         self,
         device_id: str,
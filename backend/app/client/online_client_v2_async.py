@@ -0,0 +1,973 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import base64
+import datetime
+import logging
+import os
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from threading import Thread
+from typing import Any
+from typing import Optional
+
+import aiohttp
+from app.client.client_interface import ClientInferface
+from app.client.client_interface import StatusResponse
+from app.client.device_metadata_cache import DeviceMetadataCache
+from app.client.image_download import download_image_async
+from app.client.online_client_v2 import _latest_inference_by_device
+from app.client.online_client_v2 import _process_configuration_for_sending
+from app.client.online_client_v2 import _validate_and_adapt_input_tensor_path
+from app.client.online_client_v2 import INFERENCE_BATCH_DEPTH
+from app.client.online_client_v2 import INFERENCE_BATCH_MAX_PAGES
+from app.client.online_client_v2 import INFERENCE_BATCH_SIZE
+from app.client.request_scheduler import with_request_scheduling
+from app.client.resilience import with_resilience
+from app.config.get_console_settings import get_console_settings
+from app.schemas.configuration import ConfigurationV2
+from app.schemas.device import Device
+from app.schemas.device import Devices
+from app.schemas.insight import ImageAndInference
+from app.schemas.insight import ImageDirectories
+from app.schemas.insight import Inference
+from app.utils.auth import TokenManager
+from app.utils.logger import rate_limited
+from app.utils.polling import wait_until_async
+from app.utils.timestamp import convert_iso_timestamp_to_numeric
+from app.utils.timestamp import convert_numeric_timestamp_to_iso
+from console_v2_async_api_client import ApiClient
+from console_v2_async_api_client import ApiException
+from console_v2_async_api_client import Configuration
+from console_v2_async_api_client import DeviceCommandApi
+from console_v2_async_api_client import InsightApi
+from console_v2_async_api_client import ManageDevicesApi
+from console_v2_async_api_client.models.device import Device as DeviceConsoleV2
+from console_v2_async_api_client.models.execute_command_json_body import (
+    ExecuteCommandJsonBody,
+)
+from console_v2_async_api_client.models.execute_device_command200_response import (
+    ExecuteDeviceCommand200Response,
+)
+from console_v2_async_api_client.models.get_property200_response import (
+    GetProperty200Response,
+)
+from console_v2_async_api_client.models.inferenceresults_get200_response import (
+    InferenceresultsGet200Response,
+)
+from console_v2_async_api_client.models.update_configuration_json_body import (
+    UpdateConfigurationJsonBody,
+)
+from console_v2_async_api_client.models.update_device_configuration200_response import (
+    UpdateDeviceConfiguration200Response,
+)
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+
+logger = logging.getLogger(__name__)
+
+ConsoleApiClient = with_resilience(with_request_scheduling(ApiClient))
+
+CONSOLE_POOL_SIZE = int(os.getenv("CONSOLE_POOL_SIZE", 100))
+# 0 means no limit per host
+CONSOLE_POOL_SIZE_PER_HOST = int(os.getenv("CONSOLE_POOL_SIZE_PER_HOST", 0))
+CONSOLE_KEEPALIVE_TIMEOUT = float(os.getenv("CONSOLE_KEEPALIVE_TIMEOUT", 30))
+CONSOLE_CONNECT_TIMEOUT = float(os.getenv("CONSOLE_CONNECT_TIMEOUT", 10))
+
+
+class AsyncOnlineConsoleClientV2:
+    """Coroutine implementation of the Online Console v2 client.
+
+    All the requests, console API calls and image downloads, share a single pooled
+    aiohttp session, so concurrent calls cost coroutines instead of threads.
+    Instances must only be used from the event loop they were first used in.
+    """
+
+    NUM_RETRIES = 10
+
+    def __init__(self, timeout: int, metadata_cache: DeviceMetadataCache):
+        self.timeout = timeout
+        self.metadata_cache = metadata_cache
+        # API client and the token manager renewing its token, swapped together
+        self._connection: Optional[tuple[ApiClient, TokenManager]] = None
+        self._client_lock = asyncio.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=CONSOLE_POOL_SIZE,
+                    limit_per_host=CONSOLE_POOL_SIZE_PER_HOST,
+                    keepalive_timeout=CONSOLE_KEEPALIVE_TIMEOUT,
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.timeout, connect=CONSOLE_CONNECT_TIMEOUT
+                ),
+                trust_env=True,
+            )
+        return self._session
+
+    async def _get_client(self) -> tuple[ApiClient, TokenManager]:
+        """
+        Get autogenerated asyncio API Client to interact with Online Console v2
+
+        Returns:
+            tuple[ApiClient, TokenManager]: Python API Client and the token manager
+                renewing its access token
+        """
+        try:
+            logger.debug("Attempting to create Online Console API v2 async client.")
+            (
+                console_endpoint,
+                client_id,
+                client_secret,
+                portal_authorization_endpoint,
+            ) = get_console_settings()
+            token_manager = TokenManager(
+                client_id=client_id,
+                client_secret=client_secret,
+                portal_authorization_endpoint=portal_authorization_endpoint,
+            )
+            access_token = await asyncio.to_thread(token_manager.get)
+
+            configuration = Configuration(host=console_endpoint)
+            api_client = ConsoleApiClient(
+                configuration=configuration,
+                header_name="Authorization",
+                header_value=f"Bearer {access_token}",
+            )
+            # Reuse the connections of the shared session instead of opening a
+            # new pool for every client
+            api_client.rest_client.pool_manager = self._get_session()
+            logger.info("Online Console API v2 async client successfully created.")
+
+            return api_client, token_manager
+        except Exception as e:
+            logger.error(
+                f"Failed to create Online Console API v2 async client: {e}",
+                exc_info=True,
+            )
+            raise HTTPException(
+                status_code=500, detail=f"Unable to create API client: {str(e)}"
+            )
+
+    async def get_client(self) -> ApiClient:
+        connection = self._connection
+        if connection is None:
+            async with self._client_lock:
+                if self._connection is None:
+                    logger.info(
+                        "Initializing Online Console API v2 async client connection."
+                    )
+                    self._connection = await self._get_client()
+                connection = self._connection
+        api_client, token_manager = connection
+        # The token is renewed in the background, only an expired token blocks
+        access_token = token_manager.access_token or await asyncio.to_thread(
+            token_manager.get
+        )
+        # Renewed in place, keeping the connection pool of the client
+        api_client.set_default_header("Authorization", f"Bearer {access_token}")
+        return api_client
+
+    async def reload_client(self):
+        logger.info("Reloading Online Console API async client connection.")
+        async with self._client_lock:
+            previous_connection = self._connection
+            # The previous connection is kept if the new one cannot be created
+            self._connection = await self._get_client()
+        if previous_connection is not None:
+            previous_connection[1].close()
+        self.metadata_cache.invalidate()
+
+    async def close(self):
+        if self._connection is not None:
+            self._connection[1].close()
+        if self._session is not None:
+            await self._session.close()
+
+    async def get_devices(self) -> Devices:
+        logger.debug("Fetching device list from Online Console.")
+        try:
+            api_instance = ManageDevicesApi(await self.get_client())
+            response = await api_instance.get_devices()
+            device_list = [
+                Device(
+                    device_id=device.device_id,
+                    device_name=device.device_name,
+                    connection_state=device.connection_state,
+                )
+                for device in response.devices
+            ]
+            logger.info(f"Successfully fetched {len(device_list)} devices.")
+            return Devices(devices=device_list)
+        except ApiException as api_error:
+            logger.error(
+                f"API Error while fetching devices: {api_error}", exc_info=True
+            )
+            raise
+
+    async def get_device(self, device_id: str) -> Device:
+        def _get_model_version_list(_device_info: DeviceConsoleV2) -> list[str]:
+            return_list = []
+            for chip_info in _device_info.var_property.state["device_info"]["chips"]:
+                if chip_info["name"] != "sensor_chip":
+                    continue
+                for model in chip_info["ai_models"]:
+                    if model["version"] != "":
+                        return_list.append(model["version"])
+            return return_list
+
+        try:
+            logger.debug(f"Fetching details for device ID {device_id}.")
+            api_instance = ManageDevicesApi(await self.get_client())
+            response: DeviceConsoleV2 = await api_instance.get_device(
+                device_id=device_id, _request_timeout=self.timeout
+            )
+        except ApiException as api_error:
+            logger.error(
+                f"API Error while fetching device with ID {device_id}: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API Error while fetching device with ID {device_id}: {api_error}"
+            )
+
+        try:
+            if "device_info" not in response.var_property.state:
+                raise TypeError("Device is not a v2 device.")
+            device = Device(
+                device_id=device_id,
+                device_name=response.device_name,
+                connection_state=response.connection_state,
+                models=_get_model_version_list(response),
+                application=[module.module_name for module in response.modules],
+                inference_status=response.var_property.state["device_states"][
+                    "process_state"
+                ],
+            )
+
+            logger.info(f"Successfully fetched details for device ID {device_id}.")
+            return device
+        except AttributeError as attr_error:
+            logger.error(f"Response attribute error: {attr_error}", exc_info=True)
+            raise Exception(f"Response attribute error: {attr_error}")
+        except TypeError as type_error:
+            logger.error(f"Version mismatch: {type_error}", exc_info=True)
+            raise Exception(f"Version mismatch: {type_error}")
+        except Exception as error:
+            logger.error(f"Unexpected Error during processing: {error}", exc_info=True)
+            raise Exception(f"Unexpected Error during processing: {error}")
+
+    async def _get_module_id_from_device(self, device_id: str) -> str:
+        return await self.metadata_cache.get_async(
+            device_id, "module_id", lambda: self._fetch_module_id(device_id)
+        )
+
+    async def _fetch_module_id(self, device_id: str) -> str:
+        manage_device_api = ManageDevicesApi(await self.get_client())
+
+        try:
+            device_info: DeviceConsoleV2 = await manage_device_api.get_device(
+                device_id=device_id, _request_timeout=self.timeout
+            )
+        except ApiException as api_error:
+            logger.error(
+                f"Error while retrieving device with ID {device_id}: {api_error}"
+            )
+            raise Exception(
+                f"Error while retrieving device with ID {device_id}: {api_error}"
+            )
+
+        return device_info.modules[0].module_id
+
+    async def get_configuration(self, device_id: str) -> ConfigurationV2:
+        return await self.metadata_cache.get_async(
+            device_id, "configuration", lambda: self._fetch_configuration(device_id)
+        )
+
+    async def _fetch_configuration(self, device_id: str) -> ConfigurationV2:
+        module_id = await self._get_module_id_from_device(device_id=device_id)
+
+        device_command_api = DeviceCommandApi(await self.get_client())
+        try:
+            module_info: GetProperty200Response = await device_command_api.get_property(
+                device_id=device_id, module_id=module_id, _request_timeout=self.timeout
+            )
+        except ApiException as api_error:
+            logger.error(
+                f"Error while retrieving property from device {device_id} with ID {module_id}: {api_error}"
+            )
+            raise Exception(
+                f"Error while retrieving property from device {device_id} with ID {module_id}: {api_error}"
+            )
+        try:
+            validatedConfig = ConfigurationV2.model_validate(
+                module_info.var_property.state
+            )
+        except ValidationError as validation_error:
+            logger.error(
+                f"Missing / Unexpected fields in device configuration: device {device_id} with ID {module_id}: {validation_error}"
+            )
+            raise Exception(
+                f"Missing / Unexpected fields in device configuration: device {device_id} with ID {module_id}"
+            )
+
+        return validatedConfig
+
+    async def _update_module_configuration(
+        self, device_id: str, module_id: str, configuration: dict
+    ) -> UpdateDeviceConfiguration200Response:
+        device_command_api = DeviceCommandApi(await self.get_client())
+        try:
+            return await device_command_api.update_module_configuration(
+                device_id=device_id,
+                module_id=module_id,
+                update_configuration_json_body=UpdateConfigurationJsonBody(
+                    configuration=configuration
+                ),
+                _request_timeout=self.timeout,
+            )
+        finally:
+            self.metadata_cache.invalidate(device_id, "configuration")
+
+    async def update_configuration(
+        self, device_id: str, configuration: ConfigurationV2
+    ) -> StatusResponse:
+        module_id = await self._get_module_id_from_device(device_id=device_id)
+        response = await self._update_module_configuration(
+            device_id, module_id, _process_configuration_for_sending(configuration)
+        )
+        return StatusResponse(status=response.result)
+
+    async def set_configuration(
+        self, device_id: str, configuration: ConfigurationV2
+    ) -> StatusResponse:
+        raise ApiException("Online Console V2 does not support this endpoint")
+
+    async def get_direct_image(self, device_id: str) -> str:
+        try:
+            response: ExecuteDeviceCommand200Response = await DeviceCommandApi(
+                await self.get_client()
+            ).execute_device_command(
+                device_id=device_id,
+                execute_command_json_body=ExecuteCommandJsonBody(
+                    command_name="direct_get_image",
+                    parameters={
+                        "crop_h_offset": 0,
+                        "crop_v_offset": 0,
+                        "crop_h_size": 2028,
+                        "crop_v_size": 1520,
+                        "sensor_name": "IMX500",
+                    },
+                ),
+                _request_timeout=self.timeout,
+            )
+        except ApiException as api_error:
+            logger.error(
+                f"Error while fetching direct image from device with ID {device_id}: {api_error}"
+            )
+            raise Exception(
+                f"API error while retrieving direct image from device id {device_id}: {api_error}"
+            )
+
+        error_msg = None
+        if response.result != "SUCCESS":
+            error_msg = response.result
+
+        image = response.command_response["image"]
+        if len(image) == 0:
+            error_msg = "Image received is empty"
+
+        if error_msg is not None:
+            raise Exception(
+                f"Error while fetching direct image from device with ID {device_id}: {error_msg}"
+            )
+
+        return image
+
+    async def get_latest_data(
+        self, device_id: str, get_image: bool = False, encode_image: bool = True
+    ) -> tuple[Optional[str | bytes], dict[str, str]]:
+        logger.debug(
+            "Fetching latest data for device ID '%s'. Get image: %s",
+            device_id,
+            get_image,
+        )
+        try:
+            insight_api = InsightApi(await self.get_client())
+
+            response: InferenceresultsGet200Response = (
+                await insight_api.inferenceresults_get(
+                    devices=[device_id], limit=1, _request_timeout=self.timeout
+                )
+            )
+
+            inference = {
+                "timestamp": None,
+                "content": None,
+            }
+            if response.inferences is not None and len(response.inferences) > 0:
+                timestamp_iso = response.inferences[0].inferences[0].t
+                inference = {
+                    "timestamp": convert_iso_timestamp_to_numeric(timestamp_iso),
+                    "content": response.inferences[0].inferences[0].o,
+                }
+
+            image_content: str | bytes | None = None
+            if get_image:
+                image_name = inference["timestamp"]
+
+                prev_configuration = await self.get_configuration(device_id)
+                subdirectory_name = prev_configuration.edge_app.common_settings.port_settings.input_tensor.path.split(
+                    "/"
+                )[
+                    -1
+                ]
+                image_url = None
+                for _ in range(AsyncOnlineConsoleClientV2.NUM_RETRIES):
+                    images = await insight_api.get_images(
+                        device_id=device_id,
+                        sub_directory_name=subdirectory_name,
+                        name_starts_with=image_name,
+                        _request_timeout=self.timeout,
+                    )
+                    image_urls = [x.sas_url for x in images.data]
+                    if len(image_urls) > 0:
+                        image_url = image_urls[-1]
+                        break
+                    await asyncio.sleep(0.1)
+
+                if image_url is None:
+                    # The input tensor path may have changed since it was cached
+                    self.metadata_cache.invalidate(device_id, "configuration")
+                    raise Exception(
+                        f"Image {image_name} not found in directory {subdirectory_name}"
+                    )
+
+                image_content = await download_image_async(
+                    self._get_session(), image_url, timeout=self.timeout
+                )
+                if encode_image:
+                    image_content = base64.b64encode(image_content).decode("utf-8")
+
+            # Logged at every poll of every device
+            logger.info(
+                "Successfully retrieved image and inference data for device ID '%s'",
+                device_id,
+                extra=rate_limited(device_id),
+            )
+            return image_content, inference
+        except ApiException as api_error:
+            logger.error(
+                f"API error while retrieving data from device id {device_id}: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API error while retrieving data from device id {device_id}: {api_error}"
+            )
+
+    async def get_latest_inferences(
+        self, device_ids: list[str]
+    ) -> dict[str, dict[str, str]]:
+        logger.debug("Fetching latest inferences of %d devices.", len(device_ids))
+        latest = {}
+
+        async def _get_batch(insight_api: InsightApi, batch: list[str]):
+            continuation_token = None
+            for _ in range(INFERENCE_BATCH_MAX_PAGES):
+                response: InferenceresultsGet200Response = (
+                    await insight_api.inferenceresults_get(
+                        devices=batch,
+                        limit=len(batch) * INFERENCE_BATCH_DEPTH,
+                        starting_after=continuation_token,
+                        _request_timeout=self.timeout,
+                    )
+                )
+                # Pages go from newest to oldest, the first result wins
+                for device_id, inference in _latest_inference_by_device(
+                    response
+                ).items():
+                    latest.setdefault(device_id, inference)
+                continuation_token = response.continuation_token
+                if not continuation_token or all(
+                    device_id in latest for device_id in batch
+                ):
+                    break
+
+        try:
+            insight_api = InsightApi(await self.get_client())
+            await asyncio.gather(
+                *(
+                    _get_batch(
+                        insight_api, device_ids[start : start + INFERENCE_BATCH_SIZE]
+                    )
+                    for start in range(0, len(device_ids), INFERENCE_BATCH_SIZE)
+                )
+            )
+        except ApiException as api_error:
+            logger.error(
+                f"API error while retrieving latest inferences: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API error while retrieving latest inferences: {api_error}"
+            )
+
+        return latest
+
+    async def start_upload_inference_data(
+        self, device_id: str, get_image: bool = False
+    ) -> StatusResponse:
+        logger.debug(
+            f"Starting upload inference data for device ID '{device_id}'. Get image: {get_image}"
+        )
+        try:
+            module_id = await self._get_module_id_from_device(device_id=device_id)
+
+            if get_image:
+                prev_configuration = await self.get_configuration(device_id)
+                prev_folder = (
+                    prev_configuration.edge_app.common_settings.port_settings.input_tensor.path
+                )
+                new_inference_folder = _validate_and_adapt_input_tensor_path(
+                    prev_folder, device_id=device_id
+                )
+
+                configuration = {
+                    "edge_app": {
+                        "common_settings": {
+                            "port_settings": {
+                                "input_tensor": {
+                                    "path": new_inference_folder,
+                                    "enabled": True,
+                                }
+                            }
+                        }
+                    }
+                }
+
+            else:
+                configuration = {
+                    "edge_app": {
+                        "common_settings": {
+                            "port_settings": {"input_tensor": {"enabled": False}}
+                        }
+                    }
+                }
+
+            # Start inference
+            configuration["edge_app"]["common_settings"]["process_state"] = 2
+
+            response = await self._update_module_configuration(
+                device_id, module_id, configuration
+            )
+
+            insight_api = InsightApi(await self.get_client())
+            latest_inference_id = await self._get_latest_inference_id(
+                insight_api, device_id
+            )
+
+            async def _is_started() -> bool:
+                return latest_inference_id != await self._get_latest_inference_id(
+                    insight_api, device_id
+                )
+
+            await wait_until_async(
+                _is_started, timeout=60, message="Waiting for the device to start..."
+            )
+
+            logger.debug(
+                f"[start_upload_inference_data] Device started, status response: {response.result}"
+            )
+            return StatusResponse(status=response.result)
+        except ApiException as api_error:
+            logger.error(
+                f"API error while starting to upload inference data: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API error while starting to upload inference data: {api_error}"
+            )
+
+    async def _get_latest_inference_id(
+        self, insight_api: InsightApi, device_id: str
+    ) -> str:
+        response = await insight_api.inferenceresults_get(
+            devices=[device_id], limit=1, _request_timeout=self.timeout
+        )
+        return response.inferences[0].id
+
+    async def stop_upload_inference_data(self, device_id: str) -> StatusResponse:
+        logger.debug(f"Stopping upload inference data for device ID '{device_id}'.")
+        try:
+            module_id = await self._get_module_id_from_device(device_id=device_id)
+            response = await self._update_module_configuration(
+                device_id,
+                module_id,
+                {"edge_app": {"common_settings": {"process_state": 1}}},
+            )
+            logger.info(
+                f"Successfully stopped upload inference data for device ID '{device_id}'."
+            )
+            return StatusResponse(status=response.result)
+        except ApiException as api_error:
+            logger.error(
+                f"API error while stopping to upload inference data: {api_error}",
+                exc_info=True,
+            )
+            raise Exception(
+                f"API error while stopping to upload inference data: {api_error}"
+            )
+
+    async def delete_device_data(self, device_id: str) -> StatusResponse:
+        """Deletes all image directories and inference data related to the given device."""
+        logger.debug(f"Initiating deletion of all data from device '{device_id}'.")
+        try:
+            insight_api = InsightApi(await self.get_client())
+
+            await self._delete_image_directories(insight_api, device_id)
+            await self._delete_inference_results(insight_api, device_id)
+
+            logger.info(f"Successfully deleted all data for device {device_id}")
+            return StatusResponse(status="Success")
+        except ApiException as api_error:
+            logger.error(f"API error while deleting data from {device_id}: {api_error}")
+            raise Exception(
+                f"API error while deleting data from {device_id}: {api_error}"
+            )
+
+    async def _delete_image_directories(self, insight_api: InsightApi, device_id: str):
+        """Deletes all image directories for the specified device."""
+        response = await insight_api.get_image_directories(
+            device_id, _request_timeout=self.timeout
+        )
+
+        if not response or not response[0].devices:
+            logger.debug(f"No image directories found for device {device_id}")
+            return
+
+        image_dirs = response[0].devices[0].image
+        logger.debug(
+            f"Found {len(image_dirs)} image directories for deletion on {device_id}"
+        )
+
+        await asyncio.gather(
+            *[
+                insight_api.delete_images(
+                    device_id=device_id,
+                    sub_directory_name=sub_directory,
+                    delete_images_json_body={"directory_deletion": "1"},
+                    _request_timeout=self.timeout,
+                )
+                for sub_directory in image_dirs
+            ]
+        )
+        logger.debug(f"Deleted {len(image_dirs)} image directories from {device_id}")
+
+    async def _delete_inference_results(self, insight_api: InsightApi, device_id: str):
+        """Deletes all inference results for the specified device in batches."""
+        batch_size = 100
+
+        while True:
+            inferences: InferenceresultsGet200Response = (
+                await insight_api.inferenceresults_get(
+                    devices=[device_id], limit=batch_size, _request_timeout=self.timeout
+                )
+            )
+            if not inferences.inferences:
+                logger.debug(
+                    f"No more inference results to delete for device {device_id}"
+                )
+                break
+
+            item_ids = [i.id for i in inferences.inferences]
+            await insight_api.delete_inference_results(
+                device_id=device_id,
+                item_ids=",".join(item_ids),
+                _request_timeout=self.timeout,
+            )
+            logger.debug(f"Deleted {len(item_ids)} inference results for {device_id}")
+
+    async def get_image_directories(self, device_id: str) -> ImageDirectories:
+        logger.debug("Fetching directory list from Online Console.")
+        try:
+            api_instance = InsightApi(await self.get_client())
+            response = await api_instance.get_image_directories(
+                device_id=device_id, _request_timeout=self.timeout
+            )
+            directories = response[0].devices[0].image
+            logger.info(
+                f"Successfully fetched {len(directories)} directories for device ID '{device_id}'."
+            )
+            return ImageDirectories(directories=directories)
+        except ApiException as api_error:
+            logger.error(
+                f"API Error while fetching image directories of {device_id}: {api_error}"
+            )
+            raise Exception(
+                f"API Error while fetching image directories of {device_id}: {api_error}"
+            )
+
+    async def get_images_and_inferences(
+        self,
+        device_id: str,
+        sub_directory_name: str,
+    ) -> list[ImageAndInference]:
+        logger.info(f"Fetching uploaded inferences for device ID '{device_id}'.")
+
+        try:
+            insight_api = InsightApi(await self.get_client())
+            limit = 256
+
+            response = await insight_api.get_images(
+                device_id=device_id,
+                sub_directory_name=sub_directory_name,
+                limit=limit,
+                _request_timeout=self.timeout,
+            )
+            collection = [
+                {
+                    "timestamp": data.name.split(".")[0],
+                    "image": data.sas_url,
+                    "inference": None,
+                }
+                for data in response.data
+            ]
+
+            if collection:
+                response = await insight_api.inferenceresults_get(
+                    devices=[device_id],
+                    from_datetime=convert_numeric_timestamp_to_iso(
+                        collection[0]["timestamp"]
+                    ),
+                    to_datetime=convert_numeric_timestamp_to_iso(
+                        collection[-1]["timestamp"]
+                    ),
+                    limit=limit,
+                    _request_timeout=self.timeout,
+                )
+
+                # Assign corresponding by matching inference timestamps with image timestamps in numeric fortmat
+                inference_dict = {}
+                for inferences in response.inferences or []:
+                    inference_timestamp = convert_iso_timestamp_to_numeric(
+                        inferences.inferences[0].t
+                    )
+                    inference_dict[inference_timestamp] = inferences.inferences[0].o
+
+                for data in collection:
+                    data["inference"] = inference_dict.get(data["timestamp"])
+
+            return collection
+        except ApiException as api_error:
+            error_message = f"API error while retrieving inference and image data from device id {device_id} : {api_error}"
+            logger.error(error_message, exc_info=True)
+            raise Exception(error_message)
+
+    async def get_image_content(
+        self, device_id: str, sub_directory_name: str, timestamp: str
+    ) -> bytes:
+        logger.debug(
+            f"Fetching image {timestamp} of directory '{sub_directory_name}' for device ID '{device_id}'."
+        )
+        try:
+            response = await InsightApi(await self.get_client()).get_images(
+                device_id=device_id,
+                sub_directory_name=sub_directory_name,
+                name_starts_with=timestamp,
+                _request_timeout=self.timeout,
+            )
+        except ApiException as api_error:
+            error_message = f"API error while retrieving image {timestamp} from device id {device_id} : {api_error}"
+            logger.error(error_message, exc_info=True)
+            raise Exception(error_message)
+
+        if not response.data:
+            raise Exception(
+                f"Image {timestamp} not found in directory {sub_directory_name}"
+            )
+        return await download_image_async(
+            self._get_session(), response.data[0].sas_url, timeout=self.timeout
+        )
+
+    async def get_inferences(
+        self,
+        device_id: str,
+        from_datetime: datetime.datetime,
+        to_datetime: datetime.datetime,
+        order_by: Optional[str] = "ASC",
+    ) -> list[Inference]:
+        logger.debug(
+            f"Fetching inference results for device ID '{device_id}' from {from_datetime} to {to_datetime} with order '{order_by}'"
+        )
+
+        try:
+            insight_api = InsightApi(await self.get_client())
+            response = await insight_api.inferenceresults_get(
+                devices=[device_id],
+                from_datetime=from_datetime.replace(tzinfo=None).isoformat(
+                    timespec="milliseconds"
+                ),
+                to_datetime=to_datetime.replace(tzinfo=None).isoformat(
+                    timespec="milliseconds"
+                ),
+                limit=256,
+                _request_timeout=self.timeout,
+            )
+
+            inference_list = [
+                {
+                    "timestamp": convert_iso_timestamp_to_numeric(
+                        inferences.inferences[0].t
+                    ),
+                    "inference": inferences.inferences[0].o,
+                }
+                for inferences in response.inferences or []
+                if inferences.inferences
+            ]
+
+            if order_by == "ASC":
+                inference_list.reverse()
+
+            logger.info(
+                f"Successfully retrieved inference records from {from_datetime} to {to_datetime} for device ID '{device_id}'"
+            )
+            return inference_list
+
+        except ApiException as api_error:
+            error_message = f"API error while retrieving inference data from {from_datetime} to {to_datetime} from device id {device_id} : {api_error}"
+            logger.error(error_message, exc_info=True)
+            raise Exception(error_message)
+
+
+class OnlineConsoleClientV2Async(ClientInferface):
+    """`ClientInferface` backed by `AsyncOnlineConsoleClientV2`.
+
+    The coroutine client runs in an event loop thread owned by this instance.
+    The synchronous methods, used by the device pipeline threads, wait for the
+    result of the coroutine, while the `AsyncClient` facade awaits the coroutines
+    of `native` directly through `submit`.
+    """
+
+    def __init__(self, timeout=None):
+        super().__init__(timeout)
+        self.loop = asyncio.new_event_loop()
+        self._thread = Thread(
+            target=self.loop.run_forever, name="console-client-loop", daemon=True
+        )
+        self._thread.start()
+        self.native = AsyncOnlineConsoleClientV2(self.timeout, self.metadata_cache)
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """
+        Schedule a coroutine of `native` in the client event loop.
+
+        Args:
+            coroutine (Coroutine): Coroutine to run.
+
+        Returns:
+            Future: Future resolving to the result of the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def _run(self, coroutine: Coroutine) -> Any:
+        return self.submit(coroutine).result()
+
+    def reload_client(self):
+        self._run(self.native.reload_client())
+
+    def close(self):
+        # Closes the aiohttp session and stops the token renewal, then the loop
+        self._run(self.native.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def get_devices(self) -> Devices:
+        return self._run(self.native.get_devices())
+
+    def get_device(self, device_id: str) -> Device:
+        return self._run(self.native.get_device(device_id))
+
+    def get_configuration(self, device_id: str) -> ConfigurationV2:
+        return self._run(self.native.get_configuration(device_id))
+
+    async def update_configuration(
+        self, device_id: str, configuration: ConfigurationV2
+    ) -> StatusResponse:
+        return await asyncio.wrap_future(
+            self.submit(self.native.update_configuration(device_id, configuration))
+        )
+
+    async def set_configuration(
+        self, device_id: str, configuration: ConfigurationV2
+    ) -> StatusResponse:
+        return await asyncio.wrap_future(
+            self.submit(self.native.set_configuration(device_id, configuration))
+        )
+
+    def get_direct_image(self, device_id: str) -> str:
+        return self._run(self.native.get_direct_image(device_id))
+
+    def get_latest_data(
+        self, device_id: str, get_image: bool = False, encode_image: bool = True
+    ) -> tuple[Optional[str | bytes], dict[str, str]]:
+        return self._run(
+            self.native.get_latest_data(device_id, get_image, encode_image)
+        )
+
+    def get_latest_inferences(self, device_ids: list[str]) -> dict[str, dict[str, str]]:
+        return self._run(self.native.get_latest_inferences(device_ids))
+
+    def start_upload_inference_data(
+        self, device_id: str, get_image: bool = False
+    ) -> StatusResponse:
+        return self._run(self.native.start_upload_inference_data(device_id, get_image))
+
+    def stop_upload_inference_data(self, device_id: str) -> StatusResponse:
+        return self._run(self.native.stop_upload_inference_data(device_id))
+
+    def delete_device_data(self, device_id: str) -> StatusResponse:
+        return self._run(self.native.delete_device_data(device_id))
+
+    def get_image_directories(self, device_id: str) -> ImageDirectories:
+        return self._run(self.native.get_image_directories(device_id))
+
+    def get_images_and_inferences(
+        self, device_id: str, sub_directory_name: str
+    ) -> list[ImageAndInference]:
+        return self._run(
+            self.native.get_images_and_inferences(device_id, sub_directory_name)
+        )
+
+    def get_image_content(
+        self, device_id: str, sub_directory_name: str, timestamp: str
+    ) -> bytes:
+        return self._run(
+            self.native.get_image_content(device_id, sub_directory_name, timestamp)
+        )
+
+    def get_inferences(
+        self,
+        device_id: str,
+        from_datetime: datetime.datetime,
+        to_datetime: datetime.datetime,
+        order_by: str = "ASC",
+    ) -> list[Inference]:
+        return self._run(
+            self.native.get_inferences(device_id, from_datetime, to_datetime, order_by)
+        )
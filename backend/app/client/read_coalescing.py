@@ -0,0 +1,130 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from time import monotonic
+from typing import Any
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a console read is served from cache, 0 disables the cache and only
+# coalesces concurrent reads
+CONSOLE_READ_CACHE_TTL = float(os.getenv("CONSOLE_READ_CACHE_TTL", 0))
+# Seconds after expiry an entry is still served while it is refreshed
+CONSOLE_READ_STALE_TTL = float(os.getenv("CONSOLE_READ_STALE_TTL", 0))
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.fetched_at = monotonic()
+
+
+class ReadCoalescer:
+    """Share console reads between concurrent identical requests.
+
+    Callers reading the same key while a read is in flight await that read instead
+    of making their own. With a TTL, results are also served from cache, and for
+    `stale_ttl` more seconds served stale while a single refresh runs in the
+    background (stale-while-revalidate). Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        ttl: float = CONSOLE_READ_CACHE_TTL,
+        stale_ttl: float = CONSOLE_READ_STALE_TTL,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self._cache: dict[Hashable, _Entry] = {}
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Read `key`, sharing the result with the concurrent reads of the same key.
+
+        Args:
+            key (Hashable): Identifies the read, e.g. client, method and arguments.
+            fetch (Callable[[], Awaitable[Any]]): Performs the read.
+
+        Returns:
+            Any: The result of the read. It is shared, so it must not be modified.
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            age = monotonic() - entry.fetched_at
+            if age < self.ttl:
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self._start(key, fetch)
+                return entry.value
+            del self._cache[key]
+        # Cancelling a caller must not cancel the read shared with the others
+        return await asyncio.shield(self._start(key, fetch))
+
+    def _start(
+        self, key: Hashable, fetch: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            task.add_done_callback(self._log_error)
+            self._in_flight[key] = task
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        task = asyncio.current_task()
+        try:
+            value = await fetch()
+            # Not cached if invalidated while in flight
+            if self.ttl > 0 and self._in_flight.get(key) is task:
+                self._cache[key] = _Entry(value)
+            return value
+        finally:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+
+    @staticmethod
+    def _log_error(task: asyncio.Task):
+        # Background refreshes have no caller to report their errors
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Console read failed: {task.exception()}")
+
+    def invalidate(self, client: Any, device_id: Optional[str] = None):
+        """
+        Forget the reads of a client, or only those about a device.
+
+        Reads in flight are still delivered to their callers, but later callers
+        make a new read.
+
+        Args:
+            client (Any): Client the reads were made with, first item of their key.
+            device_id (Optional[str]): Device ID among the arguments of the reads.
+        """
+        for store in (self._cache, self._in_flight):
+            for key in list(store):
+                if key[0] is client and (device_id is None or device_id in key[2:]):
+                    del store[key]
+
+
+read_coalescer = ReadCoalescer()
@@ -0,0 +1,278 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import inspect
+import logging
+import os
+from collections import deque
+from collections import OrderedDict
+from collections.abc import Callable
+from contextvars import ContextVar
+from enum import IntEnum
+from threading import Condition
+from threading import Event
+from threading import Thread
+from time import monotonic
+from typing import Optional
+
+from app.schemas.client import PriorityQueueStats
+from app.schemas.client import RequestSchedulerStats
+
+logger = logging.getLogger(__name__)
+
+# Console requests per second shared by the whole application, 0 disables the limit
+CONSOLE_RATE_LIMIT = float(os.getenv("CONSOLE_RATE_LIMIT", 20))
+CONSOLE_RATE_BURST = float(os.getenv("CONSOLE_RATE_BURST", 40))
+
+
+class RequestPriority(IntEnum):
+    """Priority classes of the console requests, the lower the more urgent."""
+
+    live = 0
+    interactive = 1
+    history = 2
+    background = 3
+
+
+# Requests granted to each priority per scheduling round while all are waiting,
+# so that the less urgent ones still get a share of the rate limit
+PRIORITY_WEIGHTS = {
+    RequestPriority.live: 8,
+    RequestPriority.interactive: 4,
+    RequestPriority.history: 2,
+    RequestPriority.background: 1,
+}
+
+
+_request_priority: ContextVar[RequestPriority] = ContextVar(
+    "request_priority", default=RequestPriority.interactive
+)
+_request_device: ContextVar[Optional[str]] = ContextVar("request_device", default=None)
+
+
+def set_request_priority(priority: RequestPriority, device_id: Optional[str] = None):
+    """Set the priority of the console requests made in the current context, and
+    the device they are made on behalf of."""
+    _request_priority.set(priority)
+    _request_device.set(device_id)
+
+
+class _Waiter:
+    __slots__ = ("enqueued_at", "grant")
+
+    def __init__(self, grant: Callable[[], None]):
+        self.enqueued_at = monotonic()
+        self.grant = grant
+
+
+class _PriorityStats:
+    __slots__ = ("requests", "total_delay", "max_delay")
+
+    def __init__(self):
+        self.requests = 0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+
+
+class RequestScheduler:
+    """Token bucket shared by all the console requests of the application.
+
+    Waiting requests are served in rounds where each priority gets up to its
+    weight in requests, the most urgent first, so that a busy priority cannot
+    starve the others. Within a priority, requests are served round-robin across
+    devices, so a device polling in a tight loop cannot starve the others.
+    """
+
+    def __init__(
+        self, rate: float = CONSOLE_RATE_LIMIT, burst: float = CONSOLE_RATE_BURST
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = self.burst
+        self._updated_at = monotonic()
+        self._condition = Condition()
+        self._queues: list[OrderedDict[Optional[str], deque[_Waiter]]] = [
+            OrderedDict() for _ in RequestPriority
+        ]
+        self._stats = [_PriorityStats() for _ in RequestPriority]
+        # Requests left to each priority in the current round
+        self._credits = [PRIORITY_WEIGHTS[priority] for priority in RequestPriority]
+        self._dispatcher: Optional[Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _enqueue(self, waiter: _Waiter):
+        priority = _request_priority.get()
+        device_id = _request_device.get()
+        with self._condition:
+            if self._dispatcher is None:
+                self._dispatcher = Thread(
+                    target=self._dispatch, name="console-scheduler", daemon=True
+                )
+                self._dispatcher.start()
+            self._queues[priority].setdefault(device_id, deque()).append(waiter)
+            self._condition.notify()
+
+    def _remove(self, waiter: _Waiter):
+        with self._condition:
+            for queue in self._queues:
+                for device_id, waiters in queue.items():
+                    if waiter in waiters:
+                        waiters.remove(waiter)
+                        if not waiters:
+                            del queue[device_id]
+                        return
+
+    def _next_waiter(self) -> Optional[tuple[RequestPriority, _Waiter]]:
+        waiting = [priority for priority, queue in enumerate(self._queues) if queue]
+        if not waiting:
+            return None
+        eligible = [priority for priority in waiting if self._credits[priority] > 0]
+        if not eligible:
+            # Every waiting priority used its share, start a new round
+            self._credits = [PRIORITY_WEIGHTS[p] for p in RequestPriority]
+            eligible = waiting
+        priority = eligible[0]
+        self._credits[priority] -= 1
+
+        queue = self._queues[priority]
+        device_id, waiters = next(iter(queue.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            # Next request of this device after the other devices
+            queue.move_to_end(device_id)
+        else:
+            del queue[device_id]
+        return RequestPriority(priority), waiter
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def _dispatch(self):
+        with self._condition:
+            while True:
+                if not any(self._queues):
+                    self._condition.wait()
+                    continue
+
+                self._refill()
+                if self._tokens < 1:
+                    self._condition.wait((1 - self._tokens) / self.rate)
+                    continue
+
+                priority, waiter = self._next_waiter()
+                self._tokens -= 1
+
+                delay = monotonic() - waiter.enqueued_at
+                stats = self._stats[priority]
+                stats.requests += 1
+                stats.total_delay += delay
+                stats.max_delay = max(stats.max_delay, delay)
+                try:
+                    waiter.grant()
+                except RuntimeError as e:
+                    # Event loop of the waiter closed in between
+                    logger.debug(f"Failed to grant console request: {e}")
+
+    def acquire(self):
+        """Block until the current thread is allowed to make a console request."""
+        if not self.enabled:
+            return
+        granted = Event()
+        self._enqueue(_Waiter(granted.set))
+        granted.wait()
+
+    async def acquire_async(self):
+        """Wait until the current task is allowed to make a console request."""
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def _grant():
+            loop.call_soon_threadsafe(
+                lambda: granted.done() or granted.set_result(None)
+            )
+
+        waiter = _Waiter(_grant)
+        self._enqueue(waiter)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            raise
+
+    def get_stats(self) -> RequestSchedulerStats:
+        with self._condition:
+            self._refill()
+            return RequestSchedulerStats(
+                rate=self.rate,
+                burst=self.burst,
+                available_tokens=self._tokens if self.enabled else self.burst,
+                priorities={
+                    priority.name: PriorityQueueStats(
+                        queued=sum(
+                            len(waiters) for waiters in self._queues[priority].values()
+                        ),
+                        requests=stats.requests,
+                        mean_delay_seconds=(
+                            stats.total_delay / stats.requests
+                            if stats.requests
+                            else 0.0
+                        ),
+                        max_delay_seconds=stats.max_delay,
+                    )
+                    for priority, stats in zip(RequestPriority, self._stats)
+                },
+            )
+
+
+request_scheduler = RequestScheduler()
+
+
+def with_request_scheduling(api_client_class: type) -> type:
+    """
+    Subclass a generated `ApiClient` so that all its requests go through the
+    request scheduler.
+
+    Args:
+        api_client_class (type): `ApiClient` of a generated console client, either
+            synchronous or asyncio.
+
+    Returns:
+        type: The scheduled `ApiClient` class.
+    """
+    if inspect.iscoroutinefunction(api_client_class.call_api):
+
+        class AsyncScheduledApiClient(api_client_class):
+            async def call_api(self, *args, **kwargs):
+                await request_scheduler.acquire_async()
+                return await super().call_api(*args, **kwargs)
+
+        return AsyncScheduledApiClient
+
+    class ScheduledApiClient(api_client_class):
+        def call_api(self, *args, **kwargs):
+            request_scheduler.acquire()
+            return super().call_api(*args, **kwargs)
+
+    return ScheduledApiClient
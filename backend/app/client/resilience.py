@@ -0,0 +1,391 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import inspect
+import logging
+import os
+import random
+import re
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from time import monotonic
+from time import sleep
+from time import time
+from typing import Any
+from typing import Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from app.metrics import CONSOLE_REQUEST_ERRORS
+from app.metrics import CONSOLE_REQUEST_SECONDS
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.exceptions import HTTPError
+from urllib3.exceptions import MaxRetryError
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+CONSOLE_RETRY_ATTEMPTS = int(os.getenv("CONSOLE_RETRY_ATTEMPTS", 3))
+CONSOLE_RETRY_BASE_DELAY = float(os.getenv("CONSOLE_RETRY_BASE_DELAY", 0.5))
+CONSOLE_RETRY_MAX_DELAY = float(os.getenv("CONSOLE_RETRY_MAX_DELAY", 10))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# The console rejected the request without processing it
+REJECTED_STATUSES = {429, 503}
+# The request may have been processed, only idempotent requests are retried
+TRANSIENT_STATUSES = {408, 500, 502, 504}
+
+# Path segments made of lowercase words, possibly versioned, are resources, the
+# others are identifiers
+_RESOURCE_SEGMENT = re.compile(r"^[a-z_]+\d*$")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a console endpoint that keeps failing."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(
+            f"Console endpoint {endpoint} is unavailable, "
+            f"retry in {retry_after:.0f} seconds."
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def error_status_code(error: BaseException, default: int = 500) -> int:
+    """
+    HTTP status code to answer when a console call failed with `error`.
+
+    Args:
+        error (BaseException): Error raised by the console client, possibly wrapping
+            the original error.
+        default (int): Status code of the errors that are not console outages.
+
+    Returns:
+        int: 503 if a circuit breaker is open, `default` otherwise.
+    """
+    while error is not None:
+        if isinstance(error, CircuitOpenError):
+            return 503
+        error = error.__cause__ or error.__context__
+    return default
+
+
+def normalize_endpoint(method: str, url: str) -> str:
+    """Key of the endpoint called, with identifiers replaced by placeholders."""
+    segments = [
+        segment if _RESOURCE_SEGMENT.match(segment) else "{id}"
+        for segment in urlsplit(url).path.split("/")
+        if segment
+    ]
+    return f"{method.upper()} /{'/'.join(segments)}"
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint after consecutive failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail
+    fast with `CircuitOpenError`. Once `reset_timeout` elapsed, a single probe call
+    is let through: it closes the circuit if it succeeds, or opens it again.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> bool:
+        """Raise `CircuitOpenError` if the call must fail fast.
+
+        Returns:
+            bool: Whether the call is the probe of the half-open circuit.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            remaining = self.reset_timeout - (monotonic() - self.opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(self.endpoint, max(remaining, 0))
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit of console endpoint {self.endpoint} closed.")
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        f"Circuit of console endpoint {self.endpoint} opened after "
+                        f"{self.failures} consecutive failures."
+                    )
+                self.opened_at = monotonic()
+                self._probing = False
+
+    def release_probe(self):
+        """Let another probe through after one was interrupted, e.g. cancelled,
+        without any outcome to record."""
+        with self._lock:
+            self._probing = False
+
+
+class CircuitBreakers:
+    """Circuit breakers of the console endpoints, created on first use."""
+
+    def __init__(self):
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = Lock()
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(endpoint)
+            return breaker
+
+    def all(self) -> list[CircuitBreaker]:
+        with self._lock:
+            return list(self._breakers.values())
+
+
+circuit_breakers = CircuitBreakers()
+
+
+def _retry_after(response: Any) -> Optional[float]:
+    value = response.getheader("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_connect_error(error: BaseException) -> bool:
+    """Whether the request failed before being sent to the console."""
+    if isinstance(error, MaxRetryError):
+        error = error.reason
+    return isinstance(
+        error,
+        (
+            NewConnectionError,
+            ConnectTimeoutError,
+            ConnectionRefusedError,
+            aiohttp.ClientConnectorError,
+        ),
+    )
+
+
+def _is_transport_error(error: BaseException) -> bool:
+    return isinstance(
+        error,
+        (HTTPError, aiohttp.ClientError, ConnectionError, TimeoutError),
+    )
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(
+        0, min(CONSOLE_RETRY_MAX_DELAY, CONSOLE_RETRY_BASE_DELAY * 2**attempt)
+    )
+
+
+def _response_retry_delay(method: str, response: Any, attempt: int) -> Optional[float]:
+    """Delay before retrying a request answered with `response`, None to give up."""
+    if attempt + 1 >= CONSOLE_RETRY_ATTEMPTS:
+        return None
+    if response.status in REJECTED_STATUSES or (
+        response.status in TRANSIENT_STATUSES and method in IDEMPOTENT_METHODS
+    ):
+        retry_after = _retry_after(response)
+        if retry_after is None:
+            return _backoff(attempt)
+        if retry_after <= CONSOLE_RETRY_MAX_DELAY:
+            return retry_after
+    return None
+
+
+def _error_retry_delay(
+    method: str, error: BaseException, attempt: int
+) -> Optional[float]:
+    """Delay before retrying a request that raised `error`, None to give up."""
+    if attempt + 1 >= CONSOLE_RETRY_ATTEMPTS:
+        return None
+    if _is_connect_error(error) or (
+        _is_transport_error(error) and method in IDEMPOTENT_METHODS
+    ):
+        return _backoff(attempt)
+    return None
+
+
+def _is_failure(response: Any) -> bool:
+    return response.status >= 500
+
+
+def _observe(
+    endpoint: str,
+    started: float,
+    response: Any = None,
+    error: Optional[BaseException] = None,
+):
+    CONSOLE_REQUEST_SECONDS.labels(endpoint).observe(monotonic() - started)
+    if error is not None:
+        CONSOLE_REQUEST_ERRORS.labels(endpoint, type(error).__name__).inc()
+    elif response.status >= 400:
+        CONSOLE_REQUEST_ERRORS.labels(endpoint, str(response.status)).inc()
+
+
+def with_resilience(api_client_class: type) -> type:
+    """
+    Subclass a generated `ApiClient` so that its requests are retried on transient
+    errors and go through the circuit breaker of their endpoint.
+
+    Connection errors, 429 and 503 responses are retried for all requests, other
+    transport errors and 5xx responses only for idempotent requests. Retries wait
+    for an exponential backoff with jitter, or the Retry-After of the response.
+
+    Args:
+        api_client_class (type): `ApiClient` of a generated console client, either
+            synchronous or asyncio.
+
+    Returns:
+        type: The resilient `ApiClient` class.
+    """
+    if inspect.iscoroutinefunction(api_client_class.call_api):
+
+        class AsyncResilientApiClient(api_client_class):
+            async def call_api(self, method, url, *args, **kwargs):
+                breaker = circuit_breakers.get(normalize_endpoint(method, url))
+                attempt = 0
+                while True:
+                    probe = breaker.before_call()
+                    started = monotonic()
+                    try:
+                        response = await super().call_api(method, url, *args, **kwargs)
+                    except Exception as e:
+                        _observe(breaker.endpoint, started, error=e)
+                        if not _is_transport_error(e):
+                            breaker.record_success()
+                            raise
+                        breaker.record_failure()
+                        delay = _error_retry_delay(method, e, attempt)
+                        if delay is None:
+                            raise
+                        logger.warning(
+                            f"Console request {breaker.endpoint} failed: {e}, "
+                            f"retrying in {delay:.1f} seconds."
+                        )
+                    except BaseException:
+                        # Interrupted, e.g. cancelled, let the next call probe
+                        if probe:
+                            breaker.release_probe()
+                        raise
+                    else:
+                        _observe(breaker.endpoint, started, response)
+                        if not _is_failure(response):
+                            breaker.record_success()
+                        else:
+                            breaker.record_failure()
+                        delay = _response_retry_delay(method, response, attempt)
+                        if delay is None:
+                            return response
+                        logger.warning(
+                            f"Console request {breaker.endpoint} answered "
+                            f"{response.status}, retrying in {delay:.1f} seconds."
+                        )
+                        # Release the connection before retrying
+                        await response.read()
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+        return AsyncResilientApiClient
+
+    class ResilientApiClient(api_client_class):
+        def call_api(self, method, url, *args, **kwargs):
+            breaker = circuit_breakers.get(normalize_endpoint(method, url))
+            attempt = 0
+            while True:
+                probe = breaker.before_call()
+                started = monotonic()
+                try:
+                    response = super().call_api(method, url, *args, **kwargs)
+                except Exception as e:
+                    _observe(breaker.endpoint, started, error=e)
+                    if not _is_transport_error(e):
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    delay = _error_retry_delay(method, e, attempt)
+                    if delay is None:
+                        raise
+                    logger.warning(
+                        f"Console request {breaker.endpoint} failed: {e}, "
+                        f"retrying in {delay:.1f} seconds."
+                    )
+                except BaseException:
+                    # Interrupted, e.g. cancelled, let the next call probe
+                    if probe:
+                        breaker.release_probe()
+                    raise
+                else:
+                    _observe(breaker.endpoint, started, response)
+                    if not _is_failure(response):
+                        breaker.record_success()
+                    else:
+                        breaker.record_failure()
+                    delay = _response_retry_delay(method, response, attempt)
+                    if delay is None:
+                        return response
+                    logger.warning(
+                        f"Console request {breaker.endpoint} answered "
+                        f"{response.status}, retrying in {delay:.1f} seconds."
+                    )
+                    # Release the connection before retrying
+                    response.read()
+                attempt += 1
+                sleep(delay)
+
+    return ResilientApiClient
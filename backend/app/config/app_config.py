@@ -15,8 +15,13 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 import os
+from threading import Lock
+from threading import Thread
+from typing import Any
+from typing import Optional
 
 import ruamel.yaml
+import watchfiles
 import yaml
 
 logger = logging.getLogger(__name__)
@@ -30,28 +35,130 @@ APP_CONFIG_FILE = os.getenv(
 )
 
 
-def update_app_config_from_yaml(key_path: list[str], value: any):
-    """Update a specific key in the YAML configuration file based on a key path."""
-    try:
+class FrozenDict(dict):
+    """Read-only dict, so that a config snapshot can be shared between threads."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("The app config snapshot is read-only.")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class AppConfigStore:
+    """Immutable in-memory snapshot of the app config file.
+
+    Readers get the current snapshot without locking nor touching the file system.
+    The snapshot is replaced as a whole, when the file changes on disk (detected by
+    a watcher thread and confirmed by its modification time) or when it is updated
+    through `update`.
+    """
+
+    def __init__(self, path: str = APP_CONFIG_FILE):
+        self.path = os.path.abspath(path)
+        self._snapshot: Optional[FrozenDict] = None
+        self._mtime: Optional[float] = None
+        self._lock = Lock()
+        self._watcher: Optional[Thread] = None
+
+    def get(self) -> FrozenDict:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.reload()
+        return snapshot
+
+    def reload(self, force: bool = False) -> FrozenDict:
+        """Load the file again if it changed since the current snapshot."""
+        with self._lock:
+            if not os.path.isfile(self.path):
+                logger.warning(f"Settings file {self.path} not found.")
+                raise FileNotFoundError("Settings file not found.")
+
+            mtime = os.stat(self.path).st_mtime
+            if force or self._snapshot is None or mtime != self._mtime:
+                logger.debug(f"Attempting to load settings from {self.path}")
+                with open(self.path) as file:
+                    settings = yaml.safe_load(file)
+                self._publish(settings, mtime)
+                logger.info("Settings successfully loaded from YAML file.")
+            self._start_watcher()
+            return self._snapshot
+
+    def update(self, key_path: list[str], value: Any) -> FrozenDict:
+        """Update a key of the config, persist it and publish the new snapshot."""
         if not key_path:
             raise ValueError("Empty key path")
 
+        self.get()
+        with self._lock:
+            app_config = _thaw(self._snapshot)
+
+            # Traverse the nested structure to find the target key
+            current = app_config
+            for key in key_path[:-1]:
+                if not isinstance(current, dict):
+                    raise ValueError(
+                        f"Cannot navigate through {type(current).__name__} at path {key_path}"
+                    )
+                current = current[key]
+            current[key_path[-1]] = value
+
+            # Using Ruamel.yaml to preserve comments in YAML files
+            with open(self.path, "w") as file:
+                ruamel.yaml.YAML().dump(app_config, file)
+            self._publish(app_config, os.stat(self.path).st_mtime)
+            return self._snapshot
+
+    def _publish(self, settings: dict, mtime: float):
+        # A single reference assignment, readers see the old or the new snapshot
+        self._snapshot = _freeze(settings)
+        self._mtime = mtime
+
+    def _start_watcher(self):
+        if self._watcher is None:
+            self._watcher = Thread(
+                target=self._watch, name="app-config-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def _watch(self):
+        # The directory is watched, files replaced by editors are still detected
+        try:
+            for _ in watchfiles.watch(
+                os.path.dirname(self.path),
+                watch_filter=lambda _, path: os.path.abspath(path) == self.path,
+            ):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.error(f"Failed to reload {self.path}: {e}", exc_info=True)
+        except Exception as e:
+            logger.warning(f"Stopped watching {self.path}: {e}")
+
+
+app_config_store = AppConfigStore()
+
+
+def update_app_config_from_yaml(key_path: list[str], value: any):
+    """Update a specific key in the YAML configuration file based on a key path."""
+    try:
         logger.debug(f"Updating key path {key_path} in {APP_CONFIG_FILE}")
-        app_config = load_app_config_from_yaml()
-
-        # Traverse the nested structure to find the target key
-        current = app_config
-        for key in key_path[:-1]:
-            if not isinstance(current, dict):
-                raise ValueError(
-                    f"Cannot navigate through {type(current).__name__} at path {key_path}"
-                )
-            current = current[key]
-        current[key_path[-1]] = value
-
-        # Using Ruamel.yaml to preserve comments in YAML files
-        with open(APP_CONFIG_FILE, "w") as file:
-            ruamel.yaml.YAML().dump(app_config, file)
+        app_config_store.update(key_path, value)
         logger.info(f"Successfully updated {key_path} in YAML file.")
     except Exception as e:
         logger.error(
@@ -68,17 +175,12 @@ def update_regions_in_app_config(regions_settings: dict):
 
 
 def load_app_config_from_yaml() -> dict:
-    """Load app config from the YAML file."""
+    """Get the app config, loaded from the YAML file when it changed.
+
+    The returned snapshot is shared and read-only.
+    """
     try:
-        logger.debug(f"Attempting to load settings from {APP_CONFIG_FILE}")
-        if not os.path.isfile(APP_CONFIG_FILE):
-            logger.warning(f"Settings file {APP_CONFIG_FILE} not found.")
-            raise FileNotFoundError("Settings file not found.")
-
-        with open(APP_CONFIG_FILE) as file:
-            settings = yaml.safe_load(file)
-            logger.info("Settings successfully loaded from YAML file.")
-            return settings
+        return app_config_store.get()
     except Exception as e:
         logger.error(
             f"Failed to load settings from {APP_CONFIG_FILE}: {e}", exc_info=True
@@ -15,6 +15,8 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 import os
+from threading import Lock
+from typing import Optional
 
 import yaml
 
@@ -60,9 +62,34 @@ def load_settings_from_yaml() -> dict:
         raise Exception(f"Failed to load settings: {str(e)}")
 
 
+class ConsoleSettingsCache:
+    """Console access settings, read from the YAML file once until invalidated."""
+
+    def __init__(self):
+        self._settings: Optional[dict] = None
+        self._lock = Lock()
+
+    def get(self) -> dict:
+        settings = self._settings
+        if settings is None:
+            with self._lock:
+                if self._settings is None:
+                    self._settings = load_settings_from_yaml()
+                settings = self._settings
+        return settings
+
+    def invalidate(self):
+        # Waits for a load in progress, which may have read the previous file
+        with self._lock:
+            self._settings = None
+
+
+console_settings_cache = ConsoleSettingsCache()
+
+
 def get_console_settings() -> tuple[str, str, str, str]:
     logger.debug("Fetching console settings.")
-    settings = load_settings_from_yaml()
+    settings = console_settings_cache.get()
     if not settings:
         logger.error("Settings file is empty or not initialized.")
         raise ValueError("Settings file is empty or not initialized.")
@@ -0,0 +1,322 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import math
+from datetime import datetime
+
+import numpy as np
+from app.data_management.device_stream import filter_human_detections
+from app.data_management.object_detection.inference_deserialization import deserialize
+from app.data_management.object_detection.inference_deserialization import (
+    detection_data_to_json,
+)
+
+logger = logging.getLogger(__name__)
+
+# Candidate bucket widths (in seconds) used when the caller does not request one
+AUTO_BUCKET_WIDTHS = [
+    1,
+    5,
+    10,
+    30,
+    60,
+    5 * 60,
+    10 * 60,
+    30 * 60,
+    60 * 60,
+    3 * 60 * 60,
+    6 * 60 * 60,
+    12 * 60 * 60,
+    24 * 60 * 60,
+]
+DEFAULT_TARGET_BUCKETS = 300
+
+
+class DetectionBatch:
+    """Flattened detections of a list of raw inferences.
+
+    All arrays are sorted by frame timestamp. Boxes of frame ``i`` are the rows of
+    ``boxes`` where ``frame_indices == i``.
+    """
+
+    def __init__(
+        self,
+        timestamps_ms: np.ndarray,
+        boxes: np.ndarray,
+        frame_indices: np.ndarray,
+    ):
+        self.timestamps_ms = timestamps_ms
+        self.boxes = boxes
+        self.frame_indices = frame_indices
+
+    @property
+    def num_frames(self) -> int:
+        return len(self.timestamps_ms)
+
+    def people_count(self) -> np.ndarray:
+        return np.bincount(self.frame_indices, minlength=self.num_frames)
+
+    def head_points(self, bbox_to_point_ratio: float) -> np.ndarray:
+        """Head point (x, y) of every detection, as a (N, 2) array."""
+        left, top, right, bottom = self.boxes.T
+        center_x = (left + right) / 2
+        center_y = bbox_to_point_ratio * top + (1 - bbox_to_point_ratio) * bottom
+        return np.column_stack((center_x, center_y))
+
+
+def numeric_timestamps_to_epoch_ms(timestamps: list[str]) -> np.ndarray:
+    """
+    Convert numeric timestamps ('YYYYMMDDHHMMSSmmm') to milliseconds since epoch.
+
+    Example:
+        >>> numeric_timestamps_to_epoch_ms(['20250101000000000'])
+        array([1735689600000])
+    """
+    iso_timestamps = [
+        f"{t[0:4]}-{t[4:6]}-{t[6:8]}T{t[8:10]}:{t[10:12]}:{t[12:14]}.{t[14:17]}"
+        for t in timestamps
+    ]
+    return np.array(iso_timestamps, dtype="datetime64[ms]").astype(np.int64)
+
+
+def epoch_ms_to_numeric_timestamps(epoch_ms: np.ndarray) -> list[str]:
+    """Inverse of `numeric_timestamps_to_epoch_ms`."""
+    iso_timestamps = np.datetime_as_string(epoch_ms.astype("datetime64[ms]"))
+    return [
+        t.replace("-", "").replace(":", "").replace("T", "").replace(".", "")
+        for t in iso_timestamps
+    ]
+
+
+def decode_detection_batch(raw_inferences: list[dict]) -> DetectionBatch:
+    """
+    Deserialize raw inferences as returned by `ClientInferface.get_inferences` and
+    flatten the human detections into arrays.
+
+    Inferences without timestamp are skipped, the ones that fail to deserialize are
+    kept as frames without detections.
+    """
+    timestamps = []
+    boxes = []
+    frame_indices = []
+    for raw_inference in raw_inferences:
+        if not raw_inference["timestamp"]:
+            continue
+        parsed_inference = filter_human_detections(
+            detection_data_to_json(deserialize(raw_inference["inference"]))
+        )
+        frame_index = len(timestamps)
+        timestamps.append(raw_inference["timestamp"])
+        for detection in parsed_inference["perception"]["object_detection_list"]:
+            bbox = detection["bounding_box"]
+            if bbox is None:
+                continue
+            boxes.append((bbox["left"], bbox["top"], bbox["right"], bbox["bottom"]))
+            frame_indices.append(frame_index)
+
+    timestamps_ms = numeric_timestamps_to_epoch_ms(timestamps)
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+    frame_indices = np.array(frame_indices, dtype=np.int64)
+
+    # Frames are usually already in ascending order, sort only when needed
+    if np.any(np.diff(timestamps_ms) < 0):
+        order = np.argsort(timestamps_ms, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        timestamps_ms = timestamps_ms[order]
+        frame_indices = rank[frame_indices]
+        box_order = np.argsort(frame_indices, kind="stable")
+        boxes = boxes[box_order]
+        frame_indices = frame_indices[box_order]
+
+    return DetectionBatch(timestamps_ms, boxes, frame_indices)
+
+
+def count_points_in_regions(
+    points: np.ndarray, frame_indices: np.ndarray, num_frames: int, regions: list
+) -> np.ndarray:
+    """
+    Count, for every frame, the points strictly inside each rectangular region.
+
+    Returns:
+        np.ndarray: (num_frames, num_regions) array of counts.
+    """
+    counts = np.zeros((num_frames, len(regions)), dtype=np.int64)
+    x, y = points[:, 0], points[:, 1]
+    for i, region in enumerate(regions):
+        x_min, x_max = sorted((region["left"], region["right"]))
+        y_min, y_max = sorted((region["top"], region["bottom"]))
+        inside = (x > x_min) & (x < x_max) & (y > y_min) & (y < y_max)
+        counts[:, i] = np.bincount(frame_indices[inside], minlength=num_frames)
+    return counts
+
+
+def accumulate_heatmap(points: np.ndarray, heatmap_settings: dict) -> np.ndarray:
+    """
+    Accumulate head points into the heatmap grid defined by the heatmap settings.
+
+    Points falling outside of the image are ignored.
+
+    Returns:
+        np.ndarray: (grid_num_h, grid_num_w) array with the number of points per cell.
+    """
+    grid_num_w = heatmap_settings["grid_num_w"]
+    grid_num_h = heatmap_settings["grid_num_h"]
+    grid_size_w = heatmap_settings["image_size_w"] // grid_num_w
+    grid_size_h = heatmap_settings["image_size_h"] // grid_num_h
+
+    grid_x = np.floor_divide(points[:, 0], grid_size_w).astype(np.int64)
+    grid_y = np.floor_divide(points[:, 1], grid_size_h).astype(np.int64)
+    in_bounds = (
+        (grid_x >= 0) & (grid_x < grid_num_w) & (grid_y >= 0) & (grid_y < grid_num_h)
+    )
+    if not np.all(in_bounds):
+        logger.warning(
+            "Ignoring %d head points out of the heatmap bounds",
+            np.count_nonzero(~in_bounds),
+        )
+
+    cells = grid_y[in_bounds] * grid_num_w + grid_x[in_bounds]
+    counts = np.bincount(cells, minlength=grid_num_h * grid_num_w)
+    return counts.reshape(grid_num_h, grid_num_w)
+
+
+def choose_bucket_width(
+    from_datetime: datetime,
+    to_datetime: datetime,
+    target_buckets: int = DEFAULT_TARGET_BUCKETS,
+) -> int:
+    """Smallest bucket width (seconds) yielding at most `target_buckets` buckets."""
+    range_seconds = max((to_datetime - from_datetime).total_seconds(), 0)
+    for width in AUTO_BUCKET_WIDTHS:
+        if range_seconds / width <= target_buckets:
+            return width
+    return int(math.ceil(range_seconds / target_buckets / AUTO_BUCKET_WIDTHS[-1])) * (
+        AUTO_BUCKET_WIDTHS[-1]
+    )
+
+
+def aggregate_by_bucket(
+    timestamps_ms: np.ndarray, values: np.ndarray, bucket_ms: int
+) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """
+    Reduce per-frame values into fixed width time buckets.
+
+    Args:
+        timestamps_ms (np.ndarray): (N,) sorted frame timestamps in epoch milliseconds.
+        values (np.ndarray): (N,) or (N, K) per-frame values.
+        bucket_ms (int): Bucket width in milliseconds.
+
+    Returns:
+        tuple: Bucket start timestamps (epoch ms), number of samples per bucket and
+        a dictionary with the "min", "max", "mean" and "last" value of each bucket.
+    """
+    buckets = timestamps_ms // bucket_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+    samples = ends - starts
+
+    values = values.astype(np.float64)
+    sums = np.add.reduceat(values, starts, axis=0)
+    mean_shape = (-1,) + (1,) * (values.ndim - 1)
+    stats = {
+        "min": np.minimum.reduceat(values, starts, axis=0),
+        "max": np.maximum.reduceat(values, starts, axis=0),
+        "mean": sums / samples.reshape(mean_shape),
+        "last": values[ends - 1],
+    }
+    return buckets[starts] * bucket_ms, samples, stats
+
+
+def aggregate_inferences(
+    raw_inferences: list[dict],
+    bucket_seconds: int,
+    regions_settings: dict | None = None,
+) -> list[dict]:
+    """
+    Aggregate raw inferences into per-bucket statistics of the people count and,
+    optionally, of the people count in each region.
+
+    Args:
+        raw_inferences (list[dict]): Inferences as returned by `get_inferences`.
+        bucket_seconds (int): Bucket width in seconds.
+        regions_settings (dict | None): `people_count_in_regions_settings` of the
+            app config. Region counts are only computed when provided.
+
+    Returns:
+        list[dict]: One entry per non-empty bucket, in ascending time order.
+    """
+    batch = decode_detection_batch(raw_inferences)
+    if batch.num_frames == 0:
+        return []
+
+    bucket_ms = bucket_seconds * 1000
+    bucket_starts, samples, count_stats = aggregate_by_bucket(
+        batch.timestamps_ms, batch.people_count(), bucket_ms
+    )
+
+    region_stats = None
+    regions = regions_settings["regions"] if regions_settings else []
+    if regions:
+        region_counts = count_points_in_regions(
+            batch.head_points(regions_settings["bbox_to_point_ratio"]),
+            batch.frame_indices,
+            batch.num_frames,
+            regions,
+        )
+        _, _, region_stats = aggregate_by_bucket(
+            batch.timestamps_ms, region_counts, bucket_ms
+        )
+
+    logger.debug(
+        "Aggregated %d inferences into %d buckets of %ds",
+        batch.num_frames,
+        len(bucket_starts),
+        bucket_seconds,
+    )
+
+    result = []
+    for i, timestamp in enumerate(epoch_ms_to_numeric_timestamps(bucket_starts)):
+        bucket = {
+            "timestamp": timestamp,
+            "samples": int(samples[i]),
+            "people_count": {name: float(s[i]) for name, s in count_stats.items()},
+        }
+        if region_stats is not None:
+            bucket["people_count_in_regions"] = {
+                region["id"]: {name: float(s[i, j]) for name, s in region_stats.items()}
+                for j, region in enumerate(regions)
+            }
+        result.append(bucket)
+    return result
+
+
+def compute_range_heatmap(
+    raw_inferences: list[dict], heatmap_settings: dict
+) -> tuple[int, np.ndarray]:
+    """
+    Compute the heatmap of all the inferences of a time range at once.
+
+    Args:
+        raw_inferences (list[dict]): Inferences as returned by `get_inferences`.
+        heatmap_settings (dict): `heatmap_settings` of the app config.
+
+    Returns:
+        tuple[int, np.ndarray]: Number of frames and the heatmap grid.
+    """
+    batch = decode_detection_batch(raw_inferences)
+    points = batch.head_points(heatmap_settings["bbox_to_point_ratio"])
+    return batch.num_frames, accumulate_heatmap(points, heatmap_settings)
@@ -0,0 +1,74 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import os
+from collections import Counter
+from collections import deque
+from collections.abc import Hashable
+from threading import Lock
+from typing import Any
+from typing import Optional
+
+from app.metrics import DATA_QUEUE_DEPTH
+from app.metrics import DATA_QUEUE_DROPS
+
+DATA_QUEUE_SIZE = int(os.getenv("DATA_QUEUE_SIZE", 256))
+
+
+class DataQueue:
+    """Bounded queue of the frames collected by the device pipelines.
+
+    When the WebSocket clients do not keep up, the oldest frames are dropped
+    instead of letting the queue, and the images it holds, grow without limit.
+    """
+
+    def __init__(self, maxsize: int = DATA_QUEUE_SIZE):
+        self._frames: deque[tuple[Hashable, Any]] = deque(maxlen=maxsize)
+        # Frames waiting per key, e.g. per device
+        self._backlog: Counter = Counter()
+        # Appended to by the device pipeline threads
+        self._lock = Lock()
+
+    def append(self, key: Hashable, frame: Any):
+        with self._lock:
+            if len(self._frames) == self._frames.maxlen:
+                DATA_QUEUE_DROPS.inc()
+                self._backlog[self._frames[0][0]] -= 1
+            self._frames.append((key, frame))
+            self._backlog[key] += 1
+            DATA_QUEUE_DEPTH.set(len(self._frames))
+
+    def pop(self) -> Optional[Any]:
+        """Oldest frame of the queue, None if it is empty."""
+        with self._lock:
+            if not self._frames:
+                return None
+            key, frame = self._frames.popleft()
+            self._backlog[key] -= 1
+            DATA_QUEUE_DEPTH.set(len(self._frames))
+        return frame
+
+    def backlog(self, key: Hashable) -> int:
+        """Number of frames of `key` waiting in the queue."""
+        return self._backlog[key]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._backlog.clear()
+            DATA_QUEUE_DEPTH.set(0)
+
+    def __len__(self) -> int:
+        return len(self._frames)
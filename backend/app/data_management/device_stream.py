@@ -14,20 +14,43 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
+import os
+import random
+from collections import deque
+from datetime import datetime
+from datetime import timezone
 from threading import Event
 from threading import Thread
+from time import time
+from typing import Optional
 
 from app.client.client_factory import get_api_client
+from app.client.request_scheduler import RequestPriority
+from app.client.request_scheduler import set_request_priority
+from app.client.resilience import CONSOLE_RETRY_MAX_DELAY
 from app.config.app_config import load_app_config_from_yaml
+from app.data_management.data_queue import DataQueue
 from app.data_management.human_detection import create_human_detection_counter
+from app.data_management.inference_poller import LatestInferencePoller
+from app.data_management.inference_poller import supports_batched_inferences
 from app.data_management.object_detection.inference_deserialization import deserialize
 from app.data_management.object_detection.inference_deserialization import (
     detection_data_to_json,
 )
+from app.metrics import FRAMES_POLLED
+from app.metrics import PIPELINE_ERRORS
 from app.schemas.common import SolutionType
+from app.schemas.processing import DevicePipelineStatus
+from app.utils.frame_trace import current_frame_trace
+from app.utils.frame_trace import FrameTrace
+from app.utils.logger import bind_log_context
+from app.utils.polling import backoff_delays
 
 logger = logging.getLogger(__name__)
 
+# Latest new frames over which the frame rate of a device is measured
+FPS_WINDOW = int(os.getenv("FPS_WINDOW", 30))
+
 
 def is_person_class(class_id):
     # For SSD MobileNet
@@ -58,16 +81,43 @@ def filter_human_detections(inference):
     return {"perception": {"object_detection_list": []}}
 
 
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
 class DevicePipeline:
     """DevicePipeline manages a thread that collects data from the device identified by device_id."""
 
-    def __init__(self, device_id: str, api_client, data_queue):
+    def __init__(
+        self,
+        device_id: str,
+        api_client,
+        data_queue,
+        inference_poller: Optional[LatestInferencePoller] = None,
+        viewed: Optional[Event] = None,
+    ):
         self.device_id: str = device_id
         self.data_thread = None
         self.active_pipeline: Event = Event()
+        # Set when stopping, interrupts the backoff after errors
+        self.stop_requested: Event = Event()
         self.last_seen = None
+        self.error_count = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        # Polling statistics, written by the collection thread only
+        self.polls = 0
+        self.duplicate_polls = 0
+        self.last_poll_at: Optional[float] = None
+        self.frame_times: deque[float] = deque(maxlen=FPS_WINDOW)
+        self.lag: Optional[float] = None
         self.api_client = api_client
         self.data_queue = data_queue
+        self.inference_poller = inference_poller
+        # Set while the frames are streamed to a subscriber
+        self.viewed: Event = viewed if viewed is not None else Event()
         logger.debug(f"DevicePipeline initialized for device_id: {device_id}")
 
     def get_client(self):
@@ -81,9 +131,15 @@ class DevicePipeline:
                 raise
         return self.api_client
 
+    def request_stop(self):
+        """Make the collection thread stop after its poll in progress, without
+        waiting for it."""
+        self.active_pipeline.clear()
+        self.stop_requested.set()
+
     def stop_data_collection(self):
         logger.info(f"Stopping data collection for device_id: {self.device_id}")
-        self.active_pipeline.clear()
+        self.request_stop()
         if self.data_thread is not None:
             self.data_thread.join()
             self.data_queue.clear()
@@ -91,12 +147,37 @@ class DevicePipeline:
     def is_active(self):
         return self.active_pipeline.is_set()
 
+    def get_status(self) -> DevicePipelineStatus:
+        """Health of the pipeline, from the statistics kept while polling."""
+        fps = 0.0
+        if len(self.frame_times) > 1:
+            # Decreases as soon as frames stop arriving
+            fps = (len(self.frame_times) - 1) / (time() - self.frame_times[0])
+        return DevicePipelineStatus(
+            device_id=self.device_id,
+            active=self.is_active(),
+            alive=self.data_thread is not None and self.data_thread.is_alive(),
+            last_poll_at=_to_datetime(self.last_poll_at),
+            last_frame_at=_to_datetime(
+                self.frame_times[-1] if self.frame_times else None
+            ),
+            lag_seconds=self.lag,
+            fps=fps,
+            polls=self.polls,
+            duplicate_ratio=self.duplicate_polls / self.polls if self.polls else 0.0,
+            backlog=self.data_queue.backlog(self.device_id),
+            error_count=self.error_count,
+            last_error=self.last_error,
+            last_error_at=_to_datetime(self.last_error_at),
+        )
+
     def start_data_collection(
         self, solution_type: SolutionType, get_image: bool = True
     ):
         if not self.active_pipeline.is_set():
             logger.info(f"Starting data collection for device_id: {self.device_id}")
             self.active_pipeline.set()
+            self.stop_requested.clear()
             self.data_thread = Thread(
                 target=self.collect_data, args=(solution_type, get_image)
             )
@@ -105,47 +186,124 @@ class DevicePipeline:
     def collect_data(self, solution_type: SolutionType, get_image: bool = True):
         app_config = load_app_config_from_yaml()
         counter = create_human_detection_counter(solution_type, app_config)
+        bind_log_context(device_id=self.device_id, solution_type=solution_type)
+        error_delays = None
+        frames_new = FRAMES_POLLED.labels(self.device_id, "new")
+        frames_duplicate = FRAMES_POLLED.labels(self.device_id, "duplicate")
+        frames_empty = FRAMES_POLLED.labels(self.device_id, "empty")
 
         while self.active_pipeline.is_set():
             try:
-                api_client = self.get_client()
-                b64_image, raw_inference = api_client.get_latest_data(
-                    device_id=self.device_id,
-                    get_image=get_image,
+                # Live polling of a viewed device goes before any other console
+                # request, polling nobody looks at only gets the leftovers
+                set_request_priority(
+                    (
+                        RequestPriority.live
+                        if self.viewed.is_set()
+                        else RequestPriority.background
+                    ),
+                    self.device_id,
                 )
+                bind_log_context(frame_timestamp=None)
+                trace = FrameTrace()
+                current_frame_trace.set(trace)
+                if not get_image and self.inference_poller is not None:
+                    # Polled in a single request with the other devices
+                    image = None
+                    raw_inference = self.inference_poller.get_latest_inference(
+                        self.device_id
+                    )
+                else:
+                    api_client = self.get_client()
+                    # Raw image bytes, encoded only when sent to the subscribers
+                    image, raw_inference = api_client.get_latest_data(
+                        device_id=self.device_id,
+                        get_image=get_image,
+                        encode_image=False,
+                    )
+                trace.stamp("fetch")
+                self.polls += 1
+                self.last_poll_at = trace.stamps["fetch"]
 
-                if (
-                    raw_inference["timestamp"]
-                    and raw_inference["timestamp"] != self.last_seen
-                ):
-                    logger.debug(f"New data received for device_id: {self.device_id}")
+                if not raw_inference["timestamp"]:
+                    frames_empty.inc()
+                elif raw_inference["timestamp"] == self.last_seen:
+                    frames_duplicate.inc()
+                    self.duplicate_polls += 1
+                else:
+                    frames_new.inc()
+                    bind_log_context(frame_timestamp=raw_inference["timestamp"])
+                    logger.debug("New data received for device_id: %s", self.device_id)
+                    self.frame_times.append(self.last_poll_at)
+                    trace.set_device_timestamp(raw_inference["timestamp"])
+                    if trace.device_timestamp is not None:
+                        self.lag = self.last_poll_at - trace.device_timestamp
                     deserialize_inference = deserialize(raw_inference["content"])
+                    trace.stamp("deserialize")
                     parsed_inference = filter_human_detections(
                         detection_data_to_json(deserialize_inference)
                     )
+                    trace.stamp("filter")
+                    # App config updates apply between frames, without stopping
+                    latest_app_config = load_app_config_from_yaml()
+                    if latest_app_config is not app_config:
+                        app_config = latest_app_config
+                        counter.reconfigure(app_config)
                     inference = counter.add_processed_data(parsed_inference)
+                    trace.stamp("counter")
 
+                    # Stamped first, the frame can be popped as soon as appended
+                    trace.stamp("enqueue")
                     self.data_queue.append(
+                        self.device_id,
                         (
-                            b64_image,
+                            image,
                             inference,
                             raw_inference["timestamp"],
                             self.device_id,
-                        )
+                            trace,
+                        ),
+                    )
+                    trace.observe(
+                        "fetch",
+                        "image_download",
+                        "deserialize",
+                        "filter",
+                        "counter",
+                        "enqueue",
                     )
                     self.last_seen = raw_inference["timestamp"]
+                error_delays = None
             except Exception as e:
-                logger.error(f"Data pipeline error in collect_data: {e}", exc_info=True)
-                raise
+                # Keep streaming through console outages, backing off until the
+                # console recovers
+                self.error_count += 1
+                self.last_error = str(e)
+                self.last_error_at = time()
+                PIPELINE_ERRORS.labels(self.device_id).inc()
+                if error_delays is None:
+                    error_delays = backoff_delays(
+                        initial_delay=1, max_delay=CONSOLE_RETRY_MAX_DELAY
+                    )
+                delay = next(error_delays) * random.uniform(0.5, 1)
+                logger.error(
+                    f"Data pipeline error in collect_data for device_id: "
+                    f"{self.device_id}, retrying in {delay:.1f} seconds: {e}",
+                    exc_info=True,
+                )
+                self.stop_requested.wait(delay)
 
 
 class DataPipeline:
     """DataPipeline is in charge of centralizing the access to data from all devices."""
 
     def __init__(self):
-        self.data_queue = []
+        self.data_queue = DataQueue()
         self.device_pipelines: dict[str, DevicePipeline] = {}
         self.api_client = None
+        self.inference_poller: Optional[LatestInferencePoller] = None
+        self.viewers = 0
+        self.viewed = Event()
         logger.debug("DataPipeline initialized")
 
     def get_client(self):
@@ -171,12 +329,26 @@ class DataPipeline:
                     return True
             return False
 
+    def get_status(self) -> list[DevicePipelineStatus]:
+        return [
+            device_pipeline.get_status()
+            for device_pipeline in list(self.device_pipelines.values())
+        ]
+
     def get_device_pipeline(self, device_id: str):
         device_pipeline = self.device_pipelines.get(device_id, None)
         if not device_pipeline:
             logger.debug(f"Creating new DevicePipeline for device_id: {device_id}")
+            if self.inference_poller is None and supports_batched_inferences(
+                self.get_client()
+            ):
+                self.inference_poller = LatestInferencePoller(self.get_client())
             device_pipeline = DevicePipeline(
-                device_id, self.get_client(), self.data_queue
+                device_id,
+                self.get_client(),
+                self.data_queue,
+                self.inference_poller,
+                self.viewed,
             )
             self.device_pipelines[device_id] = device_pipeline
         return device_pipeline
@@ -188,6 +360,12 @@ class DataPipeline:
         device_pipeline = self.get_device_pipeline(device_id)
         device_pipeline.start_data_collection(solution_type, get_image)
 
+    def request_stop(self, device_id: str):
+        """Non-blocking part of `stop_data_collection`, see `DevicePipeline`."""
+        device_pipeline = self.device_pipelines.get(device_id)
+        if device_pipeline is not None:
+            device_pipeline.request_stop()
+
     def stop_data_collection(self, device_id: str):
         logger.info(f"Stopping data collection for device_id: {device_id}")
         device_pipeline = self.get_device_pipeline(device_id)
@@ -205,9 +383,19 @@ class DataPipeline:
         self.device_pipelines.clear()
 
         self.api_client = None
+        self.inference_poller = None
+
+    def add_viewer(self):
+        """Register a subscriber of the frames, which raises the priority of the
+        polling of the devices."""
+        self.viewers += 1
+        self.viewed.set()
+
+    def remove_viewer(self):
+        self.viewers -= 1
+        if self.viewers <= 0:
+            self.viewers = 0
+            self.viewed.clear()
 
     def get_data(self):
-        if self.data_queue:
-            logger.debug("Retrieving data from data queue")
-            return self.data_queue.pop(0)
-        return None
+        return self.data_queue.pop()
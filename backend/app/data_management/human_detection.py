@@ -37,6 +37,9 @@ def create_human_detection_counter(solution_type: SolutionType, app_config):
 
 
 class PeopleCount:
+    def reconfigure(self, settings):
+        """PeopleCount has no settings in the app config."""
+
     def add_processed_data(self, parsed_inference):
         if parsed_inference is None:
             return parsed_inference
@@ -75,12 +78,24 @@ class PeopleCount:
 class PeopleCountInRegions:
 
     def __init__(self, settings):
+        self._settings = None
+        self.reconfigure(settings)
+
+    def reconfigure(self, settings):
+        """Apply the regions settings of the app config, if they changed."""
         people_count_in_regions_settings = settings["people_count_in_regions_settings"]
+        if people_count_in_regions_settings == self._settings:
+            return
+        self._settings = people_count_in_regions_settings
 
         self.bbox_to_point_ratio = people_count_in_regions_settings[
             "bbox_to_point_ratio"
         ]
         self.regions = people_count_in_regions_settings["regions"]
+        # Built once per settings instead of once per frame
+        self._polygons = {
+            region["id"]: self._region_polygon(region) for region in self.regions
+        }
 
     def add_processed_data(self, parsed_inference):
         if parsed_inference is None:
@@ -132,8 +147,9 @@ class PeopleCountInRegions:
             points.append((center_x, center_y))
         return points
 
-    def _count_points_in_region(self, points, region):
-        polygon = Polygon(
+    @staticmethod
+    def _region_polygon(region):
+        return Polygon(
             [
                 (region["left"], region["bottom"]),  # left bottom
                 (region["left"], region["top"]),  # left top
@@ -142,6 +158,9 @@ class PeopleCountInRegions:
             ]
         )
 
+    def _count_points_in_region(self, points, region):
+        polygon = self._polygons[region["id"]]
+
         count = 0
 
         for x, y in points:
@@ -154,19 +173,41 @@ class PeopleCountInRegions:
 
 class Heatmap:
     def __init__(self, settings, sigma=5, alpha=0.1):
+        self.sigma = sigma
+        self.alpha = alpha
+        self._settings = None
+        self._queue = None
+        self.reconfigure(settings)
+
+    def reconfigure(self, settings):
+        """
+        Apply the heatmap settings of the app config, if they changed.
+
+        The accumulated frames are kept when the grid shape is unchanged, only the
+        oldest ones are dropped if `last_valid_frame` decreased.
+        """
         heatmap_settings = settings["heatmap_settings"]
+        if heatmap_settings == self._settings:
+            return
+        self._settings = heatmap_settings
 
         self.image_size_w = heatmap_settings["image_size_w"]
         self.image_size_h = heatmap_settings["image_size_h"]
-        self.grid_num_w = heatmap_settings["grid_num_w"]
-        self.grid_num_h = heatmap_settings["grid_num_h"]
         self.bbox_to_point_ratio = heatmap_settings["bbox_to_point_ratio"]
-        self.sigma = sigma
-        self.alpha = alpha
 
+        grid_shape = (heatmap_settings["grid_num_h"], heatmap_settings["grid_num_w"])
+        old_queue = self._queue
         self._queue = queue.Queue(maxsize=heatmap_settings["last_valid_frame"])
-
-        self.griddata = np.zeros((self.grid_num_h, self.grid_num_w))
+        if old_queue is None or grid_shape != self.griddata.shape:
+            self.grid_num_h, self.grid_num_w = grid_shape
+            self.griddata = np.zeros(grid_shape)
+        else:
+            frames = list(old_queue.queue)
+            dropped = frames[: max(len(frames) - self._queue.maxsize, 0)]
+            for grid_points in dropped:
+                self.griddata -= self._generate_temp_griddata(grid_points)
+            for grid_points in frames[len(dropped) :]:
+                self._queue.put(grid_points)
 
         self.grid_size_w = self.image_size_w // self.grid_num_w
         self.grid_size_h = self.image_size_h // self.grid_num_h
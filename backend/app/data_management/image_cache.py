@@ -0,0 +1,178 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import Awaitable
+from collections.abc import Callable
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = os.getenv(
+    "IMAGE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "human_detection_image_cache"),
+)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+_TMP_SUFFIX = ".tmp"
+
+
+def guess_image_media_type(content: bytes) -> str:
+    """Media type of the image, based on its signature."""
+    if content.startswith(b"\x89PNG"):
+        return "image/png"
+    if content.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if content.startswith(b"BM"):
+        return "image/bmp"
+    return "application/octet-stream"
+
+
+def get_image_cache_key(device_id: str, sub_directory_name: str, timestamp: str) -> str:
+    """Cache key (and file name) of an uploaded image."""
+    image_id = f"{device_id}/{sub_directory_name}/{timestamp}"
+    return hashlib.sha256(image_id.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """Size-capped on-disk LRU cache of uploaded images.
+
+    Images are immutable once uploaded, so entries never need to be revalidated.
+    Concurrent requests of an image not yet cached share a single download, awaited
+    on the event loop so that waiting requests do not hold any thread. `get` must
+    be used from a single event loop.
+    """
+
+    def __init__(
+        self, directory: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU index from the files left by a previous run."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(_TMP_SUFFIX):
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+        logger.info(
+            f"Image cache loaded with {len(self._entries)} images ({self._total_bytes} bytes)"
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _read(self, key: str) -> bytes | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            # Evicted in between
+            return None
+
+    def _store(self, key: str, content: bytes):
+        if len(content) > self.max_bytes:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=_TMP_SUFFIX)
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        os.replace(tmp_path, self._path(key))
+
+        with self._lock:
+            self._total_bytes += len(content) - self._entries.get(key, 0)
+            self._entries[key] = len(content)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Return the cached image, fetching and caching it if needed.
+
+        Args:
+            key (str): Cache key, see `get_image_cache_key`.
+            fetch (Callable[[], Awaitable[bytes]]): Downloads the image on a cache miss.
+
+        Returns:
+            bytes: Content of the image.
+        """
+        content = await asyncio.to_thread(self._read, key)
+        if content is not None:
+            return content
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            task.add_done_callback(_retrieve_exception)
+            self._in_flight[key] = task
+        # A waiter cancelled, e.g. on disconnection, must not cancel the download
+        # shared with the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        try:
+            content = await fetch()
+            try:
+                await asyncio.to_thread(self._store, key, content)
+            except OSError as e:
+                logger.warning(f"Failed to store image in the cache: {e}")
+            return content
+        finally:
+            del self._in_flight[key]
+
+
+def _retrieve_exception(task: asyncio.Task):
+    # Reported to the waiters, if all of them were cancelled it is dropped
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,115 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+from threading import Event
+from threading import Lock
+from time import monotonic
+from time import sleep
+from typing import Optional
+
+from app.client.client_interface import ClientInferface
+
+logger = logging.getLogger(__name__)
+
+# Seconds the first poll of a batch waits for the polls of the other devices
+INFERENCE_BATCH_WINDOW = float(os.getenv("INFERENCE_BATCH_WINDOW", 0.05))
+# Seconds during which a device that had no inference at all is only polled in
+# batches, instead of also on its own when missing from the batch response
+INFERENCE_EMPTY_RETRY_INTERVAL = float(os.getenv("INFERENCE_EMPTY_RETRY_INTERVAL", 10))
+
+
+class _Batch:
+    def __init__(self):
+        self.device_ids: set[str] = set()
+        self.results: dict[str, dict[str, str]] = {}
+        self.error: Optional[Exception] = None
+        self.done = Event()
+
+
+def supports_batched_inferences(api_client: ClientInferface) -> bool:
+    """Whether the client queries the latest inferences of several devices in a
+    single request, rather than one device after the other."""
+    return (
+        type(api_client).get_latest_inferences
+        is not ClientInferface.get_latest_inferences
+    )
+
+
+class LatestInferencePoller:
+    """Batch the latest inference polls of the device pipelines.
+
+    The first pipeline polling opens a batch and waits `INFERENCE_BATCH_WINDOW`
+    seconds for the other pipelines to join it, then fetches the latest inferences
+    of all the devices of the batch with `get_latest_inferences` and hands each
+    pipeline the result of its device. Devices left out of the batch response are
+    polled by their own pipeline with `get_latest_data`, so that their errors stay
+    their own, and not again for `INFERENCE_EMPTY_RETRY_INTERVAL` seconds if they
+    have no result either.
+    """
+
+    def __init__(self, api_client: ClientInferface):
+        self.api_client = api_client
+        self._lock = Lock()
+        self._batch: Optional[_Batch] = None
+        # Devices without any inference, until when they are not queried on their own
+        self._empty_until: dict[str, float] = {}
+
+    def get_latest_inference(self, device_id: str) -> dict[str, str]:
+        """
+        Get the latest inference result of a device, polled along with the others.
+
+        Args:
+            device_id (str): Device ID
+
+        Returns:
+            dict[str, str]: Latest inference result, as returned by `get_latest_data`.
+        """
+        with self._lock:
+            leader = self._batch is None
+            if leader:
+                self._batch = _Batch()
+            batch = self._batch
+            batch.device_ids.add(device_id)
+
+        if leader:
+            sleep(INFERENCE_BATCH_WINDOW)
+            with self._lock:
+                # Later polls go to the next batch
+                self._batch = None
+            try:
+                logger.debug("Polling latest inferences of %s", batch.device_ids)
+                batch.results = self.api_client.get_latest_inferences(
+                    sorted(batch.device_ids)
+                )
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        if device_id in batch.results:
+            self._empty_until.pop(device_id, None)
+            return batch.results[device_id]
+        if monotonic() < self._empty_until.get(device_id, 0):
+            return {"timestamp": None, "content": None}
+        inference = self.api_client.get_latest_data(device_id, get_image=False)[1]
+        if not inference["timestamp"]:
+            self._empty_until[device_id] = monotonic() + INFERENCE_EMPTY_RETRY_INTERVAL
+        return inference
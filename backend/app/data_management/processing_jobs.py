@@ -0,0 +1,129 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import Coroutine
+from datetime import datetime
+from datetime import timezone
+from typing import Optional
+
+from app.schemas.processing import ProcessingJob
+from app.schemas.processing import ProcessingJobStatus
+
+logger = logging.getLogger(__name__)
+
+PROCESSING_JOBS_HISTORY = int(os.getenv("PROCESSING_JOBS_HISTORY", 256))
+
+_RUNNING_STATUSES = (ProcessingJobStatus.pending, ProcessingJobStatus.starting)
+
+
+class ProcessingJobs:
+    """Registry of the background jobs starting the processing of the devices.
+
+    Keeps the latest jobs so that their status can be polled, and publishes every
+    status change to the subscribers. Must only be used from the event loop.
+    """
+
+    def __init__(self, max_jobs: int = PROCESSING_JOBS_HISTORY):
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, ProcessingJob] = OrderedDict()
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._cancel_requested: set[str] = set()
+        self._device_locks: dict[str, asyncio.Lock] = {}
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def create(self, device_id: str) -> ProcessingJob:
+        now = datetime.now(timezone.utc)
+        job = ProcessingJob(
+            job_id=uuid.uuid4().hex,
+            device_id=device_id,
+            status=ProcessingJobStatus.pending,
+            created_at=now,
+            updated_at=now,
+        )
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            job_id, _ = self._jobs.popitem(last=False)
+            self._cancel_requested.discard(job_id)
+        self._publish(job)
+        return job
+
+    def run(self, job: ProcessingJob, coroutine: Coroutine) -> asyncio.Task:
+        """Run the coroutine of the job as a background task."""
+        task = asyncio.create_task(coroutine)
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+        return task
+
+    async def wait(self, job: ProcessingJob):
+        """Wait for the background task of the job to finish."""
+        task = self._tasks.get(job.job_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    def get(self, job_id: str) -> Optional[ProcessingJob]:
+        return self._jobs.get(job_id)
+
+    def get_running_job(self, device_id: str) -> Optional[ProcessingJob]:
+        for job in reversed(self._jobs.values()):
+            if job.device_id == device_id and job.status in _RUNNING_STATUSES:
+                return job
+        return None
+
+    def update(
+        self,
+        job: ProcessingJob,
+        status: ProcessingJobStatus,
+        detail: Optional[str] = None,
+    ):
+        job.status = status
+        job.detail = detail
+        job.updated_at = datetime.now(timezone.utc)
+        logger.info(f"Processing job {job.job_id} of {job.device_id}: {status.value}")
+        self._publish(job)
+
+    def request_cancel(self, device_id: str):
+        """Ask the running job of the device, if any, not to start the data collection."""
+        job = self.get_running_job(device_id)
+        if job is not None:
+            self._cancel_requested.add(job.job_id)
+
+    def is_cancel_requested(self, job: ProcessingJob) -> bool:
+        return job.job_id in self._cancel_requested
+
+    def device_lock(self, device_id: str) -> asyncio.Lock:
+        """Lock serializing the start and the stop of the data collection of a
+        device, which await in between their steps."""
+        lock = self._device_locks.get(device_id)
+        if lock is None:
+            lock = self._device_locks[device_id] = asyncio.Lock()
+        return lock
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, job: ProcessingJob):
+        event = {"event": "processing_job", "job": job.model_dump(mode="json")}
+        for queue in self._subscribers:
+            queue.put_nowait(event)
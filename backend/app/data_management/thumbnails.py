@@ -0,0 +1,137 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from app.loop_monitor import event_loop_monitor
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_MAX_SIZE = int(os.getenv("THUMBNAIL_MAX_SIZE", 320))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", 75))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+THUMBNAIL_CACHE_SIZE = int(os.getenv("THUMBNAIL_CACHE_SIZE", 1024))
+
+
+def create_thumbnail(content: bytes, max_size: int, quality: int) -> bytes:
+    """
+    Downscale an image to fit in a `max_size` x `max_size` box, keeping its aspect ratio.
+
+    Args:
+        content (bytes): Original image file content (PNG, JPEG, BMP...).
+        max_size (int): Maximum width and height of the thumbnail in pixels.
+        quality (int): JPEG quality of the thumbnail (1-95).
+
+    Returns:
+        bytes: JPEG encoded thumbnail.
+    """
+    with Image.open(BytesIO(content)) as image:
+        # Let the JPEG decoder downscale while decoding when possible
+        image.draft("RGB", (max_size, max_size))
+        thumbnail = image.convert("RGB")
+    thumbnail.thumbnail((max_size, max_size))
+
+    output = BytesIO()
+    thumbnail.save(output, format="JPEG", quality=quality)
+    return output.getvalue()
+
+
+class ThumbnailGenerator:
+    """Generates thumbnails in a worker pool and keeps the latest ones in memory.
+
+    Thumbnails are cached by image key, so an image requested by several
+    subscribers (or several times) is only downscaled once.
+    """
+
+    def __init__(
+        self,
+        max_size: int = THUMBNAIL_MAX_SIZE,
+        quality: int = THUMBNAIL_QUALITY,
+        workers: int = THUMBNAIL_WORKERS,
+        cache_size: int = THUMBNAIL_CACHE_SIZE,
+    ):
+        self.max_size = max_size
+        self.quality = quality
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="thumbnail"
+        )
+        event_loop_monitor.watch_executor("thumbnail", self._executor)
+        self._lock = Lock()
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+
+    def submit(self, key: str, content: bytes) -> Future:
+        """
+        Schedule the thumbnail generation of an image.
+
+        Args:
+            key (str): Unique identifier of the image.
+            content (bytes): Original image file content.
+
+        Returns:
+            Future: Future resolving to the JPEG encoded thumbnail.
+        """
+        with self._lock:
+            thumbnail = self._cache.get(key)
+            if thumbnail is not None:
+                self._cache.move_to_end(key)
+                future = Future()
+                future.set_result(thumbnail)
+                return future
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(
+                create_thumbnail, content, self.max_size, self.quality
+            )
+            self._in_flight[key] = future
+
+        # Registered outside of the lock, as it runs inline if already done
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return future
+
+    def get(self, key: str, content: bytes) -> bytes:
+        """Blocking version of `submit`."""
+        return self.submit(key, content).result()
+
+    async def generate(self, key: str, content: bytes) -> bytes:
+        """Coroutine version of `submit`."""
+        # The future is shared with the other requests of the thumbnail, so a
+        # cancelled caller must not cancel it
+        return await asyncio.shield(asyncio.wrap_future(self.submit(key, content)))
+
+    def _on_done(self, key: str, future: Future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.cancelled():
+                logger.warning("Thumbnail generation cancelled")
+                return
+            if future.exception() is not None:
+                logger.warning(f"Thumbnail generation failed: {future.exception()}")
+                return
+            self._cache[key] = future.result()
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
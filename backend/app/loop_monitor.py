@@ -0,0 +1,190 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Optional
+
+import anyio.to_thread
+from app.metrics import EVENT_LOOP_LAG_SECONDS
+from app.metrics import EVENT_LOOP_STALLS
+from app.metrics import EXECUTOR_BUSY_THREADS
+from app.metrics import EXECUTOR_QUEUE_DEPTH
+from app.metrics import HTTP_REQUESTS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks of the event loop
+LOOP_MONITOR_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL", 0.1))
+# Lag in seconds over which the event loop is considered stalled
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", 0.25))
+# Calls waiting for a thread over which a thread pool is considered saturated
+EXECUTOR_QUEUE_WARNING = int(os.getenv("EXECUTOR_QUEUE_WARNING", 16))
+_STACK_DEPTH = 12
+
+
+# Scopes of the HTTP requests being handled, by id
+_in_flight_requests: dict[int, dict] = {}
+
+
+class InFlightRequestsMiddleware:
+    """ASGI middleware keeping track of the HTTP requests being handled."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        _in_flight_requests[id(scope)] = scope
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            del _in_flight_requests[id(scope)]
+
+
+def _in_flight_paths() -> list[str]:
+    # Routes are known once the router matched the request
+    paths = []
+    for scope in list(_in_flight_requests.values()):
+        route = scope.get("route")
+        paths.append(route.path if route is not None else scope["path"])
+    return paths
+
+
+class EventLoopMonitor:
+    """Measure the scheduling lag of the event loop and the thread pool queues.
+
+    A task on the event loop sleeps for `interval` and measures how late it wakes
+    up. Meanwhile a watchdog thread checks that the task keeps waking up: when the
+    loop is stalled for more than `threshold`, it captures the stack of the event
+    loop thread and the requests in flight, reported with the stall once the loop
+    recovers.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL,
+        threshold: float = LOOP_STALL_THRESHOLD,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._saturated: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._beat_started = monotonic()
+        # Beat, requests in flight and event loop stack captured during a stall
+        self._stall: Optional[tuple[float, list[str], str]] = None
+
+    def watch_executor(self, name: str, executor: ThreadPoolExecutor):
+        """Report the queue depth of a thread pool."""
+        self._executors[name] = executor
+
+    def start(self):
+        """Start monitoring the running event loop."""
+        loop = asyncio.get_running_loop()
+        # Owned by the monitor to report its queue, used by asyncio.to_thread
+        default_executor = ThreadPoolExecutor(thread_name_prefix="asyncio")
+        loop.set_default_executor(default_executor)
+        self.watch_executor("asyncio", default_executor)
+
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _beat(self):
+        while True:
+            started = monotonic()
+            self._beat_started = started
+            await asyncio.sleep(self.interval)
+            lag = max(monotonic() - started - self.interval, 0)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if lag >= self.threshold:
+                self._report_stall(started, lag)
+            self._sample_executors()
+
+    def _watch(self):
+        while not self._stopped.wait(self.threshold / 2):
+            started = self._beat_started
+            stalled = monotonic() - started > self.interval + self.threshold
+            if stalled and (self._stall is None or self._stall[0] != started):
+                self._stall = (started, _in_flight_paths(), self._loop_stack())
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return ""
+        return "".join(traceback.format_stack(frame)[-_STACK_DEPTH:])
+
+    def _report_stall(self, started: float, lag: float):
+        stall = self._stall
+        if stall is not None and stall[0] == started:
+            _, paths, stack = stall
+        else:
+            # Shorter than the watchdog period, the cause is unknown
+            paths, stack = _in_flight_paths(), ""
+        for path in paths or ["none"]:
+            EVENT_LOOP_STALLS.labels(path).inc()
+        message = (
+            f"Event loop stalled for {lag:.3f} seconds, requests in flight: {paths}"
+        )
+        if stack:
+            message += f", event loop stack:\n{stack}"
+        logger.warning(message)
+
+    def _sample_executors(self):
+        for name, executor in self._executors.items():
+            self._set_queue_depth(name, executor._work_queue.qsize())
+        # Runs the sync endpoints and dependencies of FastAPI
+        statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+        EXECUTOR_BUSY_THREADS.labels("anyio").set(statistics.borrowed_tokens)
+        self._set_queue_depth("anyio", statistics.tasks_waiting)
+
+    def _set_queue_depth(self, name: str, depth: int):
+        EXECUTOR_QUEUE_DEPTH.labels(name).set(depth)
+        if depth >= EXECUTOR_QUEUE_WARNING and name not in self._saturated:
+            self._saturated.add(name)
+            logger.warning(f"Thread pool {name} saturated, {depth} calls waiting.")
+        elif depth == 0 and name in self._saturated:
+            self._saturated.remove(name)
+            logger.info(f"Thread pool {name} drained.")
+
+
+event_loop_monitor = EventLoopMonitor()
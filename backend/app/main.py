@@ -15,16 +15,24 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 import os
+from contextlib import asynccontextmanager
 
+from app.client.client_factory import close_api_clients
 from app.debugger import initialize_server_debugger_if_needed
+from app.loop_monitor import event_loop_monitor
+from app.loop_monitor import InFlightRequestsMiddleware
+from app.profiler import is_profiler_enabled
 from app.routers import app_config
 from app.routers import client
 from app.routers import configuration
 from app.routers import connection
+from app.routers import debug
 from app.routers import device
 from app.routers import insight
+from app.routers import metrics
 from app.routers import processing
 from app.utils.logger import configure_logger
+from app.utils.logger import RequestIdMiddleware
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -33,7 +41,16 @@ logger = logging.getLogger(__name__)
 
 initialize_server_debugger_if_needed()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    event_loop_monitor.start()
+    yield
+    await event_loop_monitor.stop()
+    await close_api_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(device.router)
 app.include_router(configuration.router)
 app.include_router(app_config.router)
@@ -41,6 +58,9 @@ app.include_router(processing.router)
 app.include_router(connection.router)
 app.include_router(client.router)
 app.include_router(insight.router)
+app.include_router(metrics.router)
+if is_profiler_enabled():
+    app.include_router(debug.router)
 
 origins = [
     "http://localhost",
@@ -59,12 +79,15 @@ if codespace_name:
     codespace_url = f"https://{codespace_name}-3000.app.github.dev"
     origins.append(codespace_url)
 
+app.add_middleware(InFlightRequestsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
 
@@ -0,0 +1,127 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+# Metrics exposed by the /metrics endpoint. They are thread-safe and updated
+# directly from the device pipeline threads, the console client threads and the
+# event loop.
+
+# Frame stages take from microseconds (counter) to seconds (console fetch)
+STAGE_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+# Inferences reach the console seconds after the device produced them
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+FRAMES_POLLED = Counter(
+    "frames_polled_total",
+    "Latest inference polls per device, by result: new, duplicate or empty.",
+    ["device_id", "result"],
+)
+FRAME_STAGE_SECONDS = Histogram(
+    "frame_stage_seconds",
+    "Time spent by new frames in each pipeline stage, from fetch to WebSocket send.",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+FRAME_LATENCY_SECONDS = Histogram(
+    "frame_latency_seconds",
+    "Time from the device timestamp of a frame to its WebSocket send.",
+    buckets=LATENCY_BUCKETS,
+)
+PIPELINE_ERRORS = Counter(
+    "pipeline_errors_total",
+    "Errors of the device pipelines.",
+    ["device_id"],
+)
+
+DATA_QUEUE_DEPTH = Gauge(
+    "data_queue_depth",
+    "Frames waiting to be sent to the WebSocket clients.",
+)
+DATA_QUEUE_DROPS = Counter(
+    "data_queue_drops_total",
+    "Frames dropped because the data queue was full.",
+)
+
+CONSOLE_REQUEST_SECONDS = Histogram(
+    "console_request_seconds",
+    "Latency of the console API requests, rate limiting included, each retry counted.",
+    ["endpoint"],
+)
+CONSOLE_REQUEST_ERRORS = Counter(
+    "console_request_errors_total",
+    "Failed console API requests, by HTTP status or exception type.",
+    ["endpoint", "reason"],
+)
+TOKEN_REFRESHES = Counter(
+    "token_refreshes_total",
+    "Access token requests to the portal, by result: success or failure.",
+    ["result"],
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections",
+    "Open processing WebSocket connections.",
+)
+WEBSOCKET_MESSAGES_SENT = Counter(
+    "websocket_messages_sent_total",
+    "Messages sent on the processing WebSockets.",
+)
+WEBSOCKET_BYTES_SENT = Counter(
+    "websocket_bytes_sent_total",
+    "Bytes sent on the processing WebSockets.",
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a callback scheduled on time.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Event loop stalls over the threshold, by route of the requests in flight.",
+    ["path"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled.",
+)
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "executor_queue_depth",
+    "Calls waiting for a thread of the thread pools.",
+    ["executor"],
+)
+EXECUTOR_BUSY_THREADS = Gauge(
+    "executor_busy_threads",
+    "Threads of the FastAPI thread pool running a call.",
+    ["executor"],
+)
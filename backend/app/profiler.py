@@ -0,0 +1,137 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+import sys
+import threading
+from collections import Counter
+from time import monotonic
+from time import sleep
+from types import FrameType
+
+logger = logging.getLogger(__name__)
+
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+PROFILER_MIN_INTERVAL = 0.001
+
+
+def is_profiler_enabled() -> bool:
+    return os.getenv("PROFILER") == "True"
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of all the threads of the process.
+
+    A sampling thread reads the current frame of every thread with
+    `sys._current_frames` at a fixed interval, so the profiled code is not
+    instrumented and only pays for the interpreter lock taken by each sample.
+    A single profile runs at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, interval: float = 0.01) -> Counter:
+        """
+        Sample the stacks of all threads, blocking the calling thread.
+
+        Args:
+            seconds (float): Duration of the profile, at most PROFILER_MAX_SECONDS.
+            interval (float): Seconds between two samples.
+
+        Returns:
+            Counter: Number of samples of each stack, as the tuple of its thread
+                name and frame names, outermost first.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running.")
+        try:
+            seconds = min(seconds, PROFILER_MAX_SECONDS)
+            interval = max(interval, PROFILER_MIN_INTERVAL)
+            logger.info(f"Profiling all threads for {seconds} seconds.")
+            stacks: Counter = Counter()
+            own_id = threading.get_ident()
+            deadline = monotonic() + seconds
+            while monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_name(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, str(thread_id)))
+                    stacks[tuple(reversed(stack))] += 1
+                sleep(interval)
+            return stacks
+        finally:
+            self._lock.release()
+
+
+def collapse_stacks(stacks: Counter) -> str:
+    """
+    Format sampled stacks in the collapsed format of flamegraph.pl and speedscope.
+
+    Example:
+        >>> collapse_stacks(Counter({("MainThread", "main (app.py:1)"): 3}))
+        'MainThread;main (app.py:1) 3\\n'
+    """
+    return "".join(
+        f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common()
+    )
+
+
+def top_functions(stacks: Counter, limit: int = 50) -> str:
+    """
+    Summarize sampled stacks as the functions with the most samples.
+
+    Args:
+        stacks (Counter): Samples, as returned by `SamplingProfiler.sample`.
+        limit (int): Number of functions to list.
+
+    Returns:
+        str: Table of the functions sorted by their own samples, i.e. samples where
+            they were running, with their cumulative samples, i.e. samples where
+            they were on the stack.
+    """
+    total = sum(stacks.values()) or 1
+    own: Counter = Counter()
+    cumulative: Counter = Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for name in set(stack[1:]):
+            cumulative[name] += count
+    lines = [f"{'own %':>8} {'cum %':>8}  function"]
+    for name, count in own.most_common(limit):
+        lines.append(
+            f"{100 * count / total:8.2f} {100 * cumulative[name] / total:8.2f}  {name}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+sampling_profiler = SamplingProfiler()
@@ -13,11 +13,14 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import asyncio
 import logging
 import os
 
 from app.client.client_factory import is_allowed_client_type
+from app.client.request_scheduler import request_scheduler
 from app.routers.dependencies import InjectDataPipeline
+from app.schemas.client import RequestSchedulerStats
 from app.schemas.common import StatusResponse
 from fastapi import APIRouter
 from fastapi import HTTPException
@@ -54,7 +57,8 @@ async def set_client_type(
             status_code=404, detail=f"Unknown client type: {client_type}"
         )
     if os.environ.get("CLIENT_TYPE", None) != client_type:
-        data_pipeline.reset_client()
+        # Waits for the polls in progress of all the pipelines
+        await asyncio.to_thread(data_pipeline.reset_client)
     os.environ["CLIENT_TYPE"] = client_type
     return StatusResponse(status="success")
 
@@ -74,3 +78,15 @@ async def get_client_type() -> str:
             status_code=404, detail="No device management client selected."
         )
     return client_type
+
+
+@router.get("/scheduler", response_model=RequestSchedulerStats)
+async def get_scheduler_stats() -> RequestSchedulerStats:
+    """
+    Retrieve the state of the console request scheduler, with the number of queued
+    requests and the queueing delay of each priority.
+    \f
+    Returns:
+        RequestSchedulerStats: Rate limit, available tokens and per priority statistics.
+    """
+    return request_scheduler.get_stats()
@@ -15,8 +15,9 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 
-from app.client.client_factory import get_api_client
-from app.client.client_interface import ClientInferface
+from app.client.async_client import AsyncClient
+from app.client.client_factory import get_async_api_client
+from app.client.resilience import error_status_code
 from app.schemas.common import StatusResponse
 from app.schemas.configuration import DeviceConfiguration
 from fastapi import APIRouter
@@ -29,7 +30,7 @@ router = APIRouter(prefix="/configurations", tags=["Configurations"])
 
 @router.get("/{device_id}", response_model=DeviceConfiguration)
 async def get_configuration_file(
-    device_id: str, api_client: ClientInferface = Depends(get_api_client)
+    device_id: str, api_client: AsyncClient = Depends(get_async_api_client)
 ) -> DeviceConfiguration:
     """
     Retrieve the configuration file for a specific device.
@@ -42,20 +43,20 @@ async def get_configuration_file(
     """
     logger.info(f"Retrieving configuration file for device_id: {device_id}")
     try:
-        return api_client.get_configuration(device_id=device_id)
+        return await api_client.get_configuration(device_id=device_id)
     except Exception as e:
         logger.error(
             f"Error retrieving configuration for device_id: {device_id} - {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
 
 
 @router.put("/{device_id}", response_model=StatusResponse)
 async def put_configuration(
     device_id: str,
     configuration: DeviceConfiguration,
-    api_client: ClientInferface = Depends(get_api_client),
+    api_client: AsyncClient = Depends(get_async_api_client),
 ) -> StatusResponse:
     """
     Apply the configuration to the device, potentially replacing an existing one.
@@ -77,14 +78,14 @@ async def put_configuration(
             f"Error replacing configuration in device_id: {device_id} - {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
 
 
 @router.patch("/{device_id}", response_model=StatusResponse)
 async def update_configuration(
     device_id: str,
     configuration: DeviceConfiguration,
-    api_client: ClientInferface = Depends(get_api_client),
+    api_client: AsyncClient = Depends(get_async_api_client),
 ) -> StatusResponse:
     """
     Updates the configuration on the device, replacing only some of its values.
@@ -106,4 +107,4 @@ async def update_configuration(
             f"Error updating configuration for device_id: {device_id} - {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
@@ -15,14 +15,13 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging
 
-from app.client.client_factory import get_api_client
-from app.client.client_interface import ClientInferface
+from app.client.client_factory import reload_api_clients
+from app.config.get_console_settings import console_settings_cache
 from app.config.get_console_settings import load_settings_from_yaml
 from app.config.get_console_settings import save_settings_to_yaml
 from app.schemas.common import StatusResponse
 from app.schemas.connection import ConsoleSettings
 from fastapi import APIRouter
-from fastapi import Depends
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
@@ -30,9 +29,7 @@ router = APIRouter(prefix="/connection", tags=["Connection"])
 
 
 @router.put("/", response_model=StatusResponse)
-async def set_console_settings(
-    settings: ConsoleSettings, api_client: ClientInferface = Depends(get_api_client)
-) -> StatusResponse:
+async def set_console_settings(settings: ConsoleSettings) -> StatusResponse:
     """
     Update the console settings and persist them to the configuration YAML file.
     \f
@@ -45,7 +42,8 @@ async def set_console_settings(
     logger.info("Received request to update console settings")
     try:
         save_settings_to_yaml(settings.model_dump())
-        api_client.reload_client()
+        console_settings_cache.invalidate()
+        await reload_api_clients()
         logger.debug("Successfully updated and saved console settings")
         return StatusResponse(status="success")
     except Exception as e:
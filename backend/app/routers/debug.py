@@ -0,0 +1,57 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+from typing import Literal
+
+from app.profiler import collapse_stacks
+from app.profiler import PROFILER_MAX_SECONDS
+from app.profiler import ProfilerBusyError
+from app.profiler import sampling_profiler
+from app.profiler import top_functions
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi.responses import PlainTextResponse
+
+# Only included when the PROFILER environment variable is "True"
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval: float = Query(0.01, ge=0.001, le=1),
+    output: Literal["collapsed", "top"] = Query("collapsed"),
+) -> str:
+    """
+    Profile all the threads of the backend, including the device pipelines.
+
+    Args:
+        seconds (float): Duration of the profile.
+        interval (float): Seconds between two samples of the stacks.
+        output (str): "collapsed" for the collapsed stacks of flamegraph.pl and
+            speedscope, "top" for the functions with the most samples.
+
+    Returns:
+        str: The profile.
+    """
+    try:
+        stacks = await asyncio.to_thread(sampling_profiler.sample, seconds, interval)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if output == "top":
+        return top_functions(stacks)
+    return collapse_stacks(stacks)
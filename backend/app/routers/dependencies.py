@@ -15,11 +15,19 @@
 # SPDX-License-Identifier: Apache-2.0
 from typing import Annotated
 
+from app.client.request_scheduler import RequestPriority
+from app.client.request_scheduler import set_request_priority
 from app.data_management.device_stream import DataPipeline
+from app.data_management.image_cache import ImageCache
+from app.data_management.processing_jobs import ProcessingJobs
+from app.data_management.thumbnails import ThumbnailGenerator
 from fastapi import Depends
 
 
 __data_pipeline__: None | DataPipeline = None
+__image_cache__: None | ImageCache = None
+__thumbnail_generator__: None | ThumbnailGenerator = None
+__processing_jobs__: None | ProcessingJobs = None
 
 
 def get_data_pipeline() -> DataPipeline:
@@ -30,3 +38,45 @@ def get_data_pipeline() -> DataPipeline:
 
 
 InjectDataPipeline = Annotated[DataPipeline, Depends(get_data_pipeline)]
+
+
+def get_image_cache() -> ImageCache:
+    global __image_cache__
+    if __image_cache__ is None:
+        __image_cache__ = ImageCache()
+    return __image_cache__
+
+
+InjectImageCache = Annotated[ImageCache, Depends(get_image_cache)]
+
+
+def get_thumbnail_generator() -> ThumbnailGenerator:
+    global __thumbnail_generator__
+    if __thumbnail_generator__ is None:
+        __thumbnail_generator__ = ThumbnailGenerator()
+    return __thumbnail_generator__
+
+
+InjectThumbnailGenerator = Annotated[
+    ThumbnailGenerator, Depends(get_thumbnail_generator)
+]
+
+
+def get_processing_jobs() -> ProcessingJobs:
+    global __processing_jobs__
+    if __processing_jobs__ is None:
+        __processing_jobs__ = ProcessingJobs()
+    return __processing_jobs__
+
+
+InjectProcessingJobs = Annotated[ProcessingJobs, Depends(get_processing_jobs)]
+
+
+async def history_priority():
+    """Schedule the console requests of the endpoint with the history priority."""
+    set_request_priority(RequestPriority.history)
+
+
+async def background_priority():
+    """Schedule the console requests of the endpoint with the background priority."""
+    set_request_priority(RequestPriority.background)
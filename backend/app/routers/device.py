@@ -16,8 +16,9 @@
 import logging
 from typing import Annotated
 
-from app.client.client_factory import get_api_client
-from app.client.client_interface import ClientInferface
+from app.client.async_client import AsyncClient
+from app.client.client_factory import get_async_api_client
+from app.client.resilience import error_status_code
 from app.schemas.device import Device
 from app.schemas.device import Devices
 from fastapi import APIRouter
@@ -30,7 +31,9 @@ router = APIRouter(prefix="/devices", tags=["Devices"])
 
 
 @router.get("/", response_model=Devices)
-async def get_devices(api_client: ClientInferface = Depends(get_api_client)) -> Devices:
+async def get_devices(
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> Devices:
     """
     Get the list of devices.
 
@@ -40,12 +43,12 @@ async def get_devices(api_client: ClientInferface = Depends(get_api_client)) ->
     """
     logger.info("Received request to retrieve the list of devices")
     try:
-        devices = api_client.get_devices()
+        devices = await api_client.get_devices()
         logger.debug("Successfully retrieved devices: %s", devices)
         return devices
     except Exception as e:
         logger.error("Error retrieving devices: %s", e, exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
 
 
 @router.get("/{device_id}", response_model=Device)
@@ -53,7 +56,7 @@ async def get_device(
     device_id: Annotated[
         str, Path(description="The ID of the device to retrieve information for")
     ],
-    api_client: ClientInferface = Depends(get_api_client),
+    api_client: AsyncClient = Depends(get_async_api_client),
 ) -> Device:
     """
     Retrieve specific device information.
@@ -66,7 +69,7 @@ async def get_device(
     """
     logger.info("Received request to retrieve information for device ID: %s", device_id)
     try:
-        device = api_client.get_device(device_id)
+        device = await api_client.get_device(device_id)
         logger.debug("Successfully retrieved device information: %s", device)
         return device
     except Exception as e:
@@ -76,4 +79,4 @@ async def get_device(
             e,
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
@@ -13,34 +13,57 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import asyncio
 import logging
+from base64 import b64decode
+from base64 import b64encode
 from datetime import datetime
+from datetime import timezone
+from email.utils import format_datetime
+from email.utils import parsedate_to_datetime
 
-from app.client.client_factory import get_api_client
-from app.client.client_interface import ClientInferface
+from app.client.async_client import AsyncClient
+from app.client.client_factory import get_async_api_client
+from app.client.resilience import error_status_code
 from app.config.app_config import load_app_config_from_yaml
+from app.data_management.aggregation import aggregate_inferences
+from app.data_management.aggregation import choose_bucket_width
+from app.data_management.aggregation import compute_range_heatmap
 from app.data_management.device_stream import filter_human_detections
 from app.data_management.human_detection import create_human_detection_counter
+from app.data_management.image_cache import get_image_cache_key
+from app.data_management.image_cache import guess_image_media_type
 from app.data_management.object_detection.inference_deserialization import deserialize
 from app.data_management.object_detection.inference_deserialization import (
     detection_data_to_json,
 )
+from app.routers.dependencies import history_priority
+from app.routers.dependencies import InjectImageCache
+from app.routers.dependencies import InjectThumbnailGenerator
 from app.schemas.common import SolutionType
+from app.schemas.insight import AggregatedInferences
 from app.schemas.insight import ImageDirectories
 from app.schemas.insight import ImagesAndInferences
 from app.schemas.insight import Inferences
+from app.schemas.insight import RangeHeatmap
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
+from fastapi import Path
 from fastapi import Query
+from fastapi import Request
+from fastapi import Response
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/insight", tags=["Insight"])
+router = APIRouter(
+    prefix="/insight", tags=["Insight"], dependencies=[Depends(history_priority)]
+)
 
 
 @router.get("/directories/{device_id}", response_model=ImageDirectories)
 async def get_image_directories(
-    device_id: str, api_client: ClientInferface = Depends(get_api_client)
+    device_id: str, api_client: AsyncClient = Depends(get_async_api_client)
 ) -> ImageDirectories:
     """Get image directories of the device.
 
@@ -52,7 +75,7 @@ async def get_image_directories(
     """
     logger.debug(f"Received request to get image directories for device: {device_id}")
     try:
-        directories = api_client.get_image_directories(device_id=device_id)
+        directories = await api_client.get_image_directories(device_id=device_id)
         logger.info(f"Successfully retrieved image directories for device: {device_id}")
         return directories
     except Exception as e:
@@ -60,7 +83,7 @@ async def get_image_directories(
             f"Error while retrieving image directories for device {device_id}: {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
 
 
 @router.get(
@@ -68,16 +91,23 @@ async def get_image_directories(
     response_model=ImagesAndInferences,
 )
 async def get_images_and_inferences(
+    request: Request,
     device_id: str,
     sub_directory_name: str,
+    thumbnail_generator: InjectThumbnailGenerator,
     solution_type: SolutionType = Query(SolutionType.people_count),
-    api_client: ClientInferface = Depends(get_api_client),
+    use_image_proxy: bool = Query(False),
+    thumbnail: bool = Query(False),
+    api_client: AsyncClient = Depends(get_async_api_client),
 ):
     """Get the list of images and inferences.
 
     Args:
         device_id (str): Device ID
         sub_directory_name (str): Name of directory where images are stored
+        use_image_proxy (bool): Whether to replace the images by URLs of the cached image proxy
+        thumbnail (bool): Whether to return downscaled images. Images only available
+            as URLs are replaced by URLs of the image proxy thumbnails
 
     Returns:
         ImagesAndInferences: Pydantic model containing a list of images and inferences
@@ -86,13 +116,14 @@ async def get_images_and_inferences(
         f"Received request to get images and inferences for device: {device_id}"
     )
     try:
-        image_and_inference_list = api_client.get_images_and_inferences(
+        image_and_inference_list = await api_client.get_images_and_inferences(
             device_id=device_id, sub_directory_name=sub_directory_name
         )
 
         app_config = load_app_config_from_yaml()
         counter = create_human_detection_counter(solution_type, app_config)
 
+        thumbnails = []
         for data in image_and_inference_list:
             if data["inference"]:
                 deserialize_inference = deserialize(data["inference"])
@@ -102,6 +133,27 @@ async def get_images_and_inferences(
                 data["inference"] = counter.add_processed_data(
                     filter_human_detections(parsed_inference)
                 )
+            if use_image_proxy or (thumbnail and _is_url(data["image"])):
+                image_url = request.url_for(
+                    "get_cached_image",
+                    device_id=device_id,
+                    sub_directory_name=sub_directory_name,
+                    timestamp=data["timestamp"],
+                )
+                if thumbnail:
+                    image_url = image_url.include_query_params(thumbnail="true")
+                data["image"] = str(image_url)
+            elif thumbnail:
+                key = get_image_cache_key(
+                    device_id, sub_directory_name, data["timestamp"]
+                )
+                future = thumbnail_generator.submit(key, b64decode(data["image"]))
+                thumbnails.append((data, future))
+
+        for data, future in thumbnails:
+            # Shared with the other requests of the thumbnail, see `generate`
+            thumbnail_content = await asyncio.shield(asyncio.wrap_future(future))
+            data["image"] = b64encode(thumbnail_content).decode("utf-8")
         logger.info(
             f"Successfully retrieved images and inferences for device: {device_id}"
         )
@@ -111,7 +163,109 @@ async def get_images_and_inferences(
             f"Error while retrieving images and inferences for device {device_id}: {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
+
+
+def _is_url(image: str) -> bool:
+    return image.startswith(("http://", "https://"))
+
+
+def _is_not_modified(
+    etag: str,
+    last_modified: datetime,
+    if_none_match: str | None,
+    if_modified_since: str | None,
+    exists: bool,
+) -> bool:
+    if if_none_match is not None:
+        # "*" matches any current representation, only known once the image is
+        # cached
+        if if_none_match.strip() == "*":
+            return exists
+        return etag in [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+    if if_modified_since is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@router.get(
+    "/image/{device_id}/{sub_directory_name}/{timestamp}",
+    response_class=Response,
+    name="get_cached_image",
+)
+async def get_image(
+    device_id: str,
+    sub_directory_name: str,
+    image_cache: InjectImageCache,
+    thumbnail_generator: InjectThumbnailGenerator,
+    timestamp: str = Path(pattern=r"^\d{17}$"),
+    thumbnail: bool = Query(False),
+    if_none_match: str | None = Header(None),
+    if_modified_since: str | None = Header(None),
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> Response:
+    """Get an uploaded image through the local image cache.
+
+    Images are immutable, so conditional requests (If-None-Match / If-Modified-Since)
+    are answered without downloading the image.
+
+    Args:
+        device_id (str): Device ID
+        sub_directory_name (str): Name of directory where the image is stored
+        timestamp (str): Timestamp of the image in numeric format
+        thumbnail (bool): Whether to return a downscaled JPEG version of the image
+
+    Returns:
+        Response: The image content
+    """
+    logger.debug(
+        f"Received request to get image {timestamp} of {sub_directory_name} for device: {device_id}"
+    )
+    key = get_image_cache_key(device_id, sub_directory_name, timestamp)
+    last_modified = datetime.strptime(timestamp, "%Y%m%d%H%M%S%f").replace(
+        microsecond=0, tzinfo=timezone.utc
+    )
+    headers = {
+        "ETag": f'"{key}-thumbnail"' if thumbnail else f'"{key}"',
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "private, max-age=86400, immutable",
+    }
+    if _is_not_modified(
+        headers["ETag"],
+        last_modified,
+        if_none_match,
+        if_modified_since,
+        image_cache.contains(key),
+    ):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        content = await image_cache.get(
+            key,
+            lambda: api_client.get_image_content(
+                device_id=device_id,
+                sub_directory_name=sub_directory_name,
+                timestamp=timestamp,
+            ),
+        )
+        if thumbnail:
+            content = await thumbnail_generator.generate(key, content)
+        return Response(
+            content=content,
+            media_type=guess_image_media_type(content),
+            headers=headers,
+        )
+    except Exception as e:
+        logger.error(
+            f"Error while retrieving image {timestamp} for device {device_id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
 
 
 @router.get(
@@ -123,7 +277,7 @@ async def get_inferences(
     from_datetime: datetime = Query(...),
     to_datetime: datetime = Query(...),
     solution_type: SolutionType = Query(SolutionType.people_count),
-    api_client: ClientInferface = Depends(get_api_client),
+    api_client: AsyncClient = Depends(get_async_api_client),
 ) -> Inferences:
     """Get the list of inferences.
 
@@ -138,7 +292,7 @@ async def get_inferences(
     """
     logger.debug(f"Received request to get inferences for device: {device_id}")
     try:
-        raw_inferences = api_client.get_inferences(
+        raw_inferences = await api_client.get_inferences(
             device_id=device_id, from_datetime=from_datetime, to_datetime=to_datetime
         )
 
@@ -166,4 +320,103 @@ async def get_inferences(
             f"Error while retrieving retrieved inferences for device {device_id}: {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
+
+
+@router.get(
+    "/aggregated_inferences/{device_id}",
+    response_model=AggregatedInferences,
+)
+async def get_aggregated_inferences(
+    device_id: str,
+    from_datetime: datetime = Query(...),
+    to_datetime: datetime = Query(...),
+    bucket_seconds: int | None = Query(None, ge=1),
+    solution_type: SolutionType = Query(SolutionType.people_count),
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> AggregatedInferences:
+    """Get the inferences aggregated in time buckets.
+
+    Each bucket contains the min, max, mean and last people count of the inferences
+    within it and, for the PeopleCountInRegions solution, the same statistics for
+    every region.
+
+    Args:
+        device_id (str): Device ID
+        from_datetime (datetime): Start datetime for filtering inferences as ISO 8601 string
+        to_datetime (datetime): End datetime for filtering inferences as ISO 8601 string
+        bucket_seconds (int | None): Bucket width in seconds. Chosen from the range if not provided
+        solution_type (SolutionType): The type of solution to process
+
+    Returns:
+        AggregatedInferences: Pydantic model containing the list of non-empty buckets
+    """
+    logger.debug(
+        f"Received request to get aggregated inferences for device: {device_id}"
+    )
+    try:
+        raw_inferences = await api_client.get_inferences(
+            device_id=device_id, from_datetime=from_datetime, to_datetime=to_datetime
+        )
+
+        if bucket_seconds is None:
+            bucket_seconds = choose_bucket_width(from_datetime, to_datetime)
+
+        regions_settings = None
+        if solution_type == SolutionType.people_count_in_regions:
+            app_config = load_app_config_from_yaml()
+            regions_settings = app_config["people_count_in_regions_settings"]
+
+        data = aggregate_inferences(raw_inferences, bucket_seconds, regions_settings)
+        logger.info(
+            f"Successfully aggregated {len(raw_inferences)} inferences into {len(data)} buckets for device: {device_id}"
+        )
+        return AggregatedInferences(bucket_seconds=bucket_seconds, data=data)
+    except Exception as e:
+        logger.error(
+            f"Error while aggregating inferences for device {device_id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
+
+
+@router.get(
+    "/heatmap/{device_id}",
+    response_model=RangeHeatmap,
+)
+async def get_range_heatmap(
+    device_id: str,
+    from_datetime: datetime = Query(...),
+    to_datetime: datetime = Query(...),
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> RangeHeatmap:
+    """Get the heatmap of the people detected within a time range.
+
+    Args:
+        device_id (str): Device ID
+        from_datetime (datetime): Start datetime for filtering inferences as ISO 8601 string
+        to_datetime (datetime): End datetime for filtering inferences as ISO 8601 string
+
+    Returns:
+        RangeHeatmap: Pydantic model containing the number of frames and the heatmap grid
+    """
+    logger.debug(f"Received request to get range heatmap for device: {device_id}")
+    try:
+        raw_inferences = await api_client.get_inferences(
+            device_id=device_id, from_datetime=from_datetime, to_datetime=to_datetime
+        )
+
+        app_config = load_app_config_from_yaml()
+        frames, heatmap = compute_range_heatmap(
+            raw_inferences, app_config["heatmap_settings"]
+        )
+        logger.info(
+            f"Successfully computed heatmap of {frames} frames for device: {device_id}"
+        )
+        return RangeHeatmap(frames=frames, heatmap=heatmap.tolist())
+    except Exception as e:
+        logger.error(
+            f"Error while computing range heatmap for device {device_id}: {e}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
@@ -14,29 +14,53 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import asyncio
+import json
 import logging
+import os
+from base64 import b64encode
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
 
-from app.client.client_factory import get_api_client
-from app.client.client_interface import ClientInferface
+from app.client.async_client import AsyncClient
+from app.client.client_factory import get_async_api_client
+from app.client.resilience import error_status_code
+from app.data_management.device_stream import DataPipeline
+from app.data_management.processing_jobs import ProcessingJobs
+from app.metrics import WEBSOCKET_BYTES_SENT
+from app.metrics import WEBSOCKET_CONNECTIONS
+from app.metrics import WEBSOCKET_MESSAGES_SENT
+from app.routers.dependencies import background_priority
 from app.routers.dependencies import InjectDataPipeline
+from app.routers.dependencies import InjectProcessingJobs
+from app.routers.dependencies import InjectThumbnailGenerator
 from app.schemas.common import SolutionType
 from app.schemas.common import StatusResponse
+from app.schemas.processing import BulkProcessingRequest
+from app.schemas.processing import BulkProcessingResult
+from app.schemas.processing import BulkStartProcessingRequest
+from app.schemas.processing import ProcessingJob
+from app.schemas.processing import ProcessingJobStatus
+from app.schemas.processing import ProcessingStatus
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Query
 from fastapi import WebSocket
 from fastapi import WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/processing", tags=["Processing"])
 
 active_data_pipeline = asyncio.Event()
 
+BULK_PROCESSING_CONCURRENCY = int(os.getenv("BULK_PROCESSING_CONCURRENCY", 16))
+
 
 @router.get("/image/{device_id}", response_model=str)
 async def get_image(
-    device_id: str, api_client: ClientInferface = Depends(get_api_client)
+    device_id: str, api_client: AsyncClient = Depends(get_async_api_client)
 ) -> str:
     """Get image from device.
 
@@ -48,8 +72,8 @@ async def get_image(
     """
     logger.debug(f"Received request to get image for device: {device_id}")
     try:
-        api_client.stop_upload_inference_data(device_id=device_id)
-        base64_image = api_client.get_direct_image(device_id=device_id)
+        await api_client.stop_upload_inference_data(device_id=device_id)
+        base64_image = await api_client.get_direct_image(device_id=device_id)
         if base64_image is None:
             logger.warning(f"Image retrieval failed for device: {device_id}")
             raise HTTPException(status_code=500, detail="Couldn't retrieve image")
@@ -59,61 +83,190 @@ async def get_image(
         logger.error(
             f"Error while retrieving image for device {device_id}: {e}", exc_info=True
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
+
+
+async def _start_processing_job(
+    job: ProcessingJob,
+    processing_jobs: ProcessingJobs,
+    data_pipeline: DataPipeline,
+    api_client: AsyncClient,
+    receive_image: bool,
+    solution_type: SolutionType,
+):
+    device_id = job.device_id
+    device_lock = processing_jobs.device_lock(device_id)
+    processing_jobs.update(job, ProcessingJobStatus.starting)
+    try:
+        # Let a stop in progress, which did not cancel this job, finish first
+        async with device_lock:
+            pass
+        await api_client.stop_upload_inference_data(device_id=device_id)
+
+        response = await api_client.start_upload_inference_data(
+            device_id=device_id, get_image=receive_image
+        )
+        # Not while a stop joins the collection thread of the device
+        async with device_lock:
+            if processing_jobs.is_cancel_requested(job):
+                logger.info(
+                    f"Processing stopped while starting for device: {device_id}"
+                )
+                await api_client.stop_upload_inference_data(device_id=device_id)
+                processing_jobs.update(job, ProcessingJobStatus.cancelled)
+                return
 
+            if not active_data_pipeline.is_set() or not data_pipeline.is_active(
+                device_id
+            ):
+                logger.info(f"Starting data collection for device: {device_id}")
+                data_pipeline.start_data_collection(
+                    device_id=device_id,
+                    solution_type=solution_type,
+                    get_image=receive_image,
+                )
+                if not active_data_pipeline.is_set():
+                    active_data_pipeline.set()
 
-@router.post("/start_processing/{device_id}", response_model=StatusResponse)
+        logger.info(f"Data processing started for device: {device_id}")
+        processing_jobs.update(job, ProcessingJobStatus.streaming, response.status)
+    except Exception as e:
+        logger.error(
+            f"Error while starting processing for device {device_id}: {e}",
+            exc_info=True,
+        )
+        processing_jobs.update(job, ProcessingJobStatus.failed, str(e))
+
+
+def _get_or_create_start_job(
+    device_id: str,
+    processing_jobs: ProcessingJobs,
+    data_pipeline: DataPipeline,
+    api_client: AsyncClient,
+    receive_image: bool,
+    solution_type: SolutionType,
+) -> ProcessingJob:
+    job = processing_jobs.get_running_job(device_id)
+    if job is not None:
+        logger.info(f"Processing is already starting for device: {device_id}")
+        return job
+
+    job = processing_jobs.create(device_id)
+    processing_jobs.run(
+        job,
+        _start_processing_job(
+            job,
+            processing_jobs,
+            data_pipeline,
+            api_client,
+            receive_image,
+            solution_type,
+        ),
+    )
+    return job
+
+
+@router.post("/start_processing/{device_id}", response_model=ProcessingJob)
 async def start_processing(
     device_id: str,
     data_pipeline: InjectDataPipeline,
+    processing_jobs: InjectProcessingJobs,
     receive_image: bool = Query(False),
     solution_type: SolutionType = Query(SolutionType.people_count),
-    api_client: ClientInferface = Depends(get_api_client),
-) -> StatusResponse:
+    wait: bool = Query(False),
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> ProcessingJob:
     """This endpoint starts the data processing for a specific device,
        as well as the data collection.
 
+    Starting the device can take up to a minute, so it is done in a background job
+    whose status is available at /processing/jobs/{job_id} and, on request, as
+    WebSocket events. A job already starting the device is returned as is.
+
     Args:
         device_id (str): Device ID
         receive_image (bool): Whether or not to receive image data
         solution_type (SolutionType): The type of solution to process
+        wait (bool): Whether to respond only once the device is streaming
 
     Returns:
-        StatusResponse: Status of the operation
+        ProcessingJob: The job starting the processing
     """
     logger.debug(f"Received request to start processing for device: {device_id}")
-    try:
-        api_client.stop_upload_inference_data(device_id=device_id)
+    job = _get_or_create_start_job(
+        device_id,
+        processing_jobs,
+        data_pipeline,
+        api_client,
+        receive_image,
+        solution_type,
+    )
+    if wait:
+        await processing_jobs.wait(job)
+        if job.status == ProcessingJobStatus.failed:
+            raise HTTPException(status_code=500, detail=job.detail)
+    return job
 
-        response = api_client.start_upload_inference_data(
-            device_id=device_id, get_image=receive_image
-        )
-        if not active_data_pipeline.is_set() or not data_pipeline.is_active(device_id):
-            logger.info(f"Starting data collection for device: {device_id}")
-            data_pipeline.start_data_collection(
-                device_id=device_id,
-                solution_type=solution_type,
-                get_image=receive_image,
-            )
-            if not active_data_pipeline.is_set():
-                active_data_pipeline.set()
 
-        logger.info(f"Data processing started for device: {device_id}")
-        return response
+@router.get("/jobs/{job_id}", response_model=ProcessingJob)
+async def get_processing_job(
+    job_id: str, processing_jobs: InjectProcessingJobs
+) -> ProcessingJob:
+    """Get the status of a job started by /processing/start_processing.
+
+    Args:
+        job_id (str): Job ID
+
+    Returns:
+        ProcessingJob: The job
+    """
+    job = processing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
 
-    except Exception as e:
-        logger.error(
-            f"Error while starting processing for device {device_id}: {e}",
-            exc_info=True,
-        )
-        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/status", response_model=ProcessingStatus)
+async def get_processing_status(data_pipeline: InjectDataPipeline) -> ProcessingStatus:
+    """Get the health of the data collection of each device.
+
+    Returns:
+        ProcessingStatus: Liveness, polling statistics, backlog and errors of the
+            pipeline of each device
+    """
+    return ProcessingStatus(
+        active=active_data_pipeline.is_set(),
+        queue_depth=len(data_pipeline.data_queue),
+        devices=data_pipeline.get_status(),
+    )
+
+
+async def _stop_processing(
+    device_id: str,
+    processing_jobs: ProcessingJobs,
+    data_pipeline: DataPipeline,
+    api_client: AsyncClient,
+) -> StatusResponse:
+    processing_jobs.request_cancel(device_id)
+    # Start jobs created from now on wait for the stop to complete
+    async with processing_jobs.device_lock(device_id):
+        if active_data_pipeline.is_set():
+            logger.info(f"Stopping data collection for device: {device_id}")
+            # Waits for the poll in progress, which can take up to the console
+            # timeout
+            await asyncio.to_thread(data_pipeline.stop_data_collection, device_id)
+            if not data_pipeline.is_active():
+                active_data_pipeline.clear()
+        logger.info(f"Data processing stopped for device: {device_id}")
+        return await api_client.stop_upload_inference_data(device_id=device_id)
 
 
 @router.post("/stop_processing/{device_id}", response_model=StatusResponse)
 async def stop_processing(
     device_id: str,
     data_pipeline: InjectDataPipeline,
-    api_client: ClientInferface = Depends(get_api_client),
+    processing_jobs: InjectProcessingJobs,
+    api_client: AsyncClient = Depends(get_async_api_client),
 ) -> StatusResponse:
     """This endpoint stops the data processing for a specific device, as well as the data collection.
 
@@ -125,43 +278,204 @@ async def stop_processing(
     """
     logger.debug(f"Received request to stop processing for device: {device_id}")
     try:
-        if active_data_pipeline.is_set():
-            logger.info(f"Stopping data collection for device: {device_id}")
-            data_pipeline.stop_data_collection(device_id)
-            if not data_pipeline.is_active():
-                active_data_pipeline.clear()
-        logger.info(f"Data processing stopped for device: {device_id}")
-        return api_client.stop_upload_inference_data(device_id=device_id)
+        return await _stop_processing(
+            device_id, processing_jobs, data_pipeline, api_client
+        )
     except Exception as e:
         logger.error(
             f"Error while stopping processing for device {device_id}: {e}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=error_status_code(e), detail=str(e))
+
+
+async def _stream_bulk_results(
+    device_ids: list[str],
+    operation: Callable[[str], Awaitable[BulkProcessingResult]],
+) -> AsyncIterator[str]:
+    semaphore = asyncio.Semaphore(BULK_PROCESSING_CONCURRENCY)
+
+    async def _run(device_id: str) -> BulkProcessingResult:
+        async with semaphore:
+            return await operation(device_id)
+
+    # Duplicated devices are only processed once
+    tasks = [
+        asyncio.create_task(_run(device_id)) for device_id in dict.fromkeys(device_ids)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            yield result.model_dump_json() + "\n"
+    finally:
+        # The client disconnected before the end
+        for task in tasks:
+            task.cancel()
+
+
+@router.post(
+    "/bulk/start_processing",
+    response_class=StreamingResponse,
+    dependencies=[Depends(background_priority)],
+)
+async def bulk_start_processing(
+    request: BulkStartProcessingRequest,
+    data_pipeline: InjectDataPipeline,
+    processing_jobs: InjectProcessingJobs,
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> StreamingResponse:
+    """Start the data processing of several devices.
+
+    The devices are started concurrently, at most BULK_PROCESSING_CONCURRENCY at a
+    time. The result of every device is streamed as a line of newline-delimited
+    JSON as soon as the device is streaming or failed to start.
+
+    Args:
+        request (BulkStartProcessingRequest): Devices to start and processing options
+
+    Returns:
+        StreamingResponse: A BulkProcessingResult per device, in completion order
+    """
+    logger.info(
+        f"Received request to start processing for {len(request.device_ids)} devices"
+    )
+
+    async def _start(device_id: str) -> BulkProcessingResult:
+        job = _get_or_create_start_job(
+            device_id,
+            processing_jobs,
+            data_pipeline,
+            api_client,
+            request.receive_image,
+            request.solution_type,
+        )
+        await processing_jobs.wait(job)
+        return BulkProcessingResult(
+            device_id=device_id,
+            status=job.status.value,
+            detail=job.detail,
+            job_id=job.job_id,
+        )
+
+    return StreamingResponse(
+        _stream_bulk_results(request.device_ids, _start),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post(
+    "/bulk/stop_processing",
+    response_class=StreamingResponse,
+    dependencies=[Depends(background_priority)],
+)
+async def bulk_stop_processing(
+    request: BulkProcessingRequest,
+    data_pipeline: InjectDataPipeline,
+    processing_jobs: InjectProcessingJobs,
+    api_client: AsyncClient = Depends(get_async_api_client),
+) -> StreamingResponse:
+    """Stop the data processing of several devices.
+
+    Works as /processing/bulk/start_processing.
+
+    Args:
+        request (BulkProcessingRequest): Devices to stop
+
+    Returns:
+        StreamingResponse: A BulkProcessingResult per device, in completion order
+    """
+    logger.info(
+        f"Received request to stop processing for {len(request.device_ids)} devices"
+    )
+    # All the pipelines finish their poll in progress in parallel, instead of one
+    # after the other as their threads are joined
+    for device_id in request.device_ids:
+        data_pipeline.request_stop(device_id)
+
+    async def _stop(device_id: str) -> BulkProcessingResult:
+        try:
+            response = await _stop_processing(
+                device_id, processing_jobs, data_pipeline, api_client
+            )
+            return BulkProcessingResult(device_id=device_id, status=response.status)
+        except Exception as e:
+            logger.error(
+                f"Error while stopping processing for device {device_id}: {e}",
+                exc_info=True,
+            )
+            return BulkProcessingResult(
+                device_id=device_id,
+                status=ProcessingJobStatus.failed.value,
+                detail=str(e),
+            )
+
+    return StreamingResponse(
+        _stream_bulk_results(request.device_ids, _stop),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, data_pipeline: InjectDataPipeline):
-    """This endpoint handles the WebSocket connection for real-time data streaming."""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    data_pipeline: InjectDataPipeline,
+    thumbnail_generator: InjectThumbnailGenerator,
+    processing_jobs: InjectProcessingJobs,
+    thumbnail: bool = Query(False),
+    events: bool = Query(False),
+    trace: bool = Query(False),
+):
+    """This endpoint handles the WebSocket connection for real-time data streaming.
+
+    Args:
+        thumbnail (bool): Whether to stream downscaled images instead of the originals
+        events (bool): Whether to also send the status changes of the processing jobs
+        trace (bool): Whether to add to each frame the time it spent in each stage
+            of the pipeline, in milliseconds
+    """
     logger.debug("WebSocket connection initiated")
     await websocket.accept()
+    WEBSOCKET_CONNECTIONS.inc()
     websocket_closed = False
+    viewing = False
+    job_events = processing_jobs.subscribe() if events else None
 
     try:
-        await active_data_pipeline.wait()
+        if job_events is None:
+            await active_data_pipeline.wait()
+        else:
+            while not active_data_pipeline.is_set():
+                await _send_job_events(websocket, job_events)
+                await asyncio.sleep(0.1)
 
         logger.info("WebSocket data streaming started")
+        data_pipeline.add_viewer()
+        viewing = True
         while active_data_pipeline.is_set():
+            if job_events is not None:
+                await _send_job_events(websocket, job_events)
             data = data_pipeline.get_data()
             if data:
-                image, inference, timestamp, device_id = data
+                image, inference, timestamp, device_id, frame_trace = data
+                frame_trace.stamp("queue")
+                if thumbnail and image:
+                    image = await thumbnail_generator.generate(
+                        f"{device_id}/{timestamp}", image
+                    )
+                if image:
+                    image = b64encode(image).decode("utf-8")
                 data_to_send = {
                     "image": image,
                     "inference": inference,
                     "timestamp": timestamp,
                     "deviceId": device_id,
                 }
-                await websocket.send_json(data_to_send)
+                if trace:
+                    data_to_send["trace"] = frame_trace.to_dict()
+                await _send_json(websocket, data_to_send)
+                frame_trace.stamp("send")
+                frame_trace.observe("queue", "send")
+                frame_trace.observe_latency()
             await asyncio.sleep(0.1)
 
     except WebSocketDisconnect:
@@ -172,6 +486,24 @@ async def websocket_endpoint(websocket: WebSocket, data_pipeline: InjectDataPipe
         logger.error(f"Unexpected error in WebSocket connection: {e}")
 
     finally:
+        WEBSOCKET_CONNECTIONS.dec()
+        if viewing:
+            data_pipeline.remove_viewer()
+        if job_events is not None:
+            processing_jobs.unsubscribe(job_events)
         if not websocket_closed:
             logger.debug("Closing WebSocket connection")
             await websocket.close()
+
+
+async def _send_job_events(websocket: WebSocket, job_events: asyncio.Queue):
+    while not job_events.empty():
+        await _send_json(websocket, job_events.get_nowait())
+
+
+async def _send_json(websocket: WebSocket, data: dict):
+    # Same encoding as WebSocket.send_json, counting what is sent
+    text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    await websocket.send_text(text)
+    WEBSOCKET_MESSAGES_SENT.inc()
+    WEBSOCKET_BYTES_SENT.inc(len(text.encode("utf-8")))
@@ -37,3 +37,27 @@ class Inference(BaseModel):
 
 class Inferences(BaseModel):
     data: list[Inference]
+
+
+class CountStatistics(BaseModel):
+    min: float
+    max: float
+    mean: float
+    last: float
+
+
+class AggregatedBucket(BaseModel):
+    timestamp: str
+    samples: int
+    people_count: CountStatistics
+    people_count_in_regions: dict[str, CountStatistics] | None = None
+
+
+class AggregatedInferences(BaseModel):
+    bucket_seconds: int
+    data: list[AggregatedBucket]
+
+
+class RangeHeatmap(BaseModel):
+    frames: int
+    heatmap: list[list[int]]
@@ -0,0 +1,88 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from app.schemas.common import SolutionType
+from pydantic import BaseModel
+from pydantic import Field
+
+
+class ProcessingJobStatus(str, Enum):
+    pending = "PENDING"
+    starting = "STARTING"
+    streaming = "STREAMING"
+    failed = "FAILED"
+    cancelled = "CANCELLED"
+
+
+class ProcessingJob(BaseModel):
+    job_id: str
+    device_id: str
+    status: ProcessingJobStatus
+    detail: Optional[str] = Field(
+        None, description="Console status response, or error if the job failed."
+    )
+    created_at: datetime
+    updated_at: datetime
+
+
+class BulkProcessingRequest(BaseModel):
+    device_ids: list[str] = Field(min_length=1)
+
+
+class BulkStartProcessingRequest(BulkProcessingRequest):
+    receive_image: bool = False
+    solution_type: SolutionType = SolutionType.people_count
+
+
+class BulkProcessingResult(BaseModel):
+    device_id: str
+    status: str
+    detail: Optional[str] = None
+    job_id: Optional[str] = None
+
+
+class DevicePipelineStatus(BaseModel):
+    device_id: str
+    active: bool = Field(description="Whether data collection is requested.")
+    alive: bool = Field(description="Whether the collection thread is running.")
+    last_poll_at: Optional[datetime] = Field(
+        None, description="Time of the last successful poll of the console."
+    )
+    last_frame_at: Optional[datetime] = Field(
+        None, description="Time at which the last new frame was received."
+    )
+    lag_seconds: Optional[float] = Field(
+        None,
+        description="Time from the device timestamp of the last new frame to its reception.",
+    )
+    fps: float = Field(description="New frames per second, over the recent frames.")
+    polls: int
+    duplicate_ratio: float = Field(
+        description="Share of the polls returning an already seen frame."
+    )
+    backlog: int = Field(description="Frames waiting to be sent to the WebSockets.")
+    error_count: int
+    last_error: Optional[str] = None
+    last_error_at: Optional[datetime] = None
+
+
+class ProcessingStatus(BaseModel):
+    active: bool
+    queue_depth: int
+    devices: list[DevicePipelineStatus]
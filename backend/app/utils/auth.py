@@ -15,12 +15,23 @@
 # SPDX-License-Identifier: Apache-2.0
 import base64
 import logging
+import os
+from threading import Lock
+from threading import Timer
+from time import monotonic
+from typing import Optional
 
 import requests
+from app.metrics import TOKEN_REFRESHES
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+# Seconds before expiry at which the token is renewed in the background
+TOKEN_REFRESH_MARGIN = float(os.getenv("TOKEN_REFRESH_MARGIN", 60))
+TOKEN_REFRESH_RETRY_DELAY = 10
+TOKEN_EXPIRY_BUFFER = 10
+
 
 def get_token(
     client_id: str, client_secret: str, portal_authorization_endpoint: str
@@ -78,3 +89,92 @@ def get_token(
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve access token: {str(error)}"
         )
+
+
+class TokenManager:
+    """Access token of the Online Console, renewed before it expires.
+
+    The token is refreshed by a background timer `TOKEN_REFRESH_MARGIN` seconds
+    before expiry, so callers normally never wait for the portal. If the background
+    refresh failed and the token expired, the first caller refreshes it inline and
+    concurrent callers wait for that single refresh instead of requesting their own.
+    """
+
+    def __init__(
+        self, client_id: str, client_secret: str, portal_authorization_endpoint: str
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.portal_authorization_endpoint = portal_authorization_endpoint
+        self._access_token: Optional[str] = None
+        self._expiry = 0.0
+        self._lock = Lock()
+        self._timer: Optional[Timer] = None
+        self._closed = False
+
+    @property
+    def access_token(self) -> Optional[str]:
+        """The access token if it is still valid, without blocking."""
+        if monotonic() < self._expiry:
+            return self._access_token
+        return None
+
+    def get(self) -> str:
+        """
+        Get a valid access token, refreshing it if needed.
+
+        Returns:
+            str: Access token.
+        """
+        access_token = self.access_token
+        if access_token is not None:
+            return access_token
+        with self._lock:
+            # Refreshed by another caller while waiting for the lock
+            if monotonic() < self._expiry:
+                return self._access_token
+            return self._refresh()
+
+    def _refresh(self) -> str:
+        try:
+            access_token, expires_in = get_token(
+                client_id=self.client_id,
+                client_secret=self.client_secret,
+                portal_authorization_endpoint=self.portal_authorization_endpoint,
+            )
+        except Exception:
+            TOKEN_REFRESHES.labels("failure").inc()
+            raise
+        TOKEN_REFRESHES.labels("success").inc()
+        self._access_token = access_token
+        self._expiry = monotonic() + expires_in - TOKEN_EXPIRY_BUFFER
+        logger.info(f"Access token refreshed, valid for {expires_in} seconds.")
+        self._schedule_refresh(max(expires_in - TOKEN_REFRESH_MARGIN, 1))
+        return access_token
+
+    def _schedule_refresh(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._closed:
+            return
+        self._timer = Timer(delay, self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning(
+                    f"Background access token refresh failed: {e}, retrying in "
+                    f"{TOKEN_REFRESH_RETRY_DELAY} seconds."
+                )
+                self._schedule_refresh(TOKEN_REFRESH_RETRY_DELAY)
+
+    def close(self):
+        """Stop the background refresh."""
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
@@ -0,0 +1,116 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from contextvars import ContextVar
+from datetime import datetime
+from datetime import timezone
+from time import time
+from typing import Optional
+
+from app.metrics import FRAME_LATENCY_SECONDS
+from app.metrics import FRAME_STAGE_SECONDS
+
+# Stages of a frame, each measured from the stamp of the previous stage
+# (or from `start` for the image download, which happens within the fetch)
+STAGES = {
+    "fetch": "fetch_start",
+    "image_download": "download_start",
+    "deserialize": "fetch",
+    "filter": "deserialize",
+    "counter": "filter",
+    "enqueue": "counter",
+    "queue": "enqueue",
+    "send": "queue",
+}
+
+# Trace of the frame being fetched by the current pipeline thread, stamped by the
+# console client while it fetches the frame
+current_frame_trace: ContextVar[Optional["FrameTrace"]] = ContextVar(
+    "current_frame_trace", default=None
+)
+
+
+def device_time(timestamp: str) -> float:
+    """
+    Convert a numeric device timestamp to a POSIX time.
+
+    Example:
+        >>> device_time('20250101000000000')
+        1735689600.0
+    """
+    return (
+        datetime.strptime(timestamp, "%Y%m%d%H%M%S%f")
+        .replace(tzinfo=timezone.utc)
+        .timestamp()
+    )
+
+
+class FrameTrace:
+    """Wall clock times at which a frame went through the pipeline stages.
+
+    Stages are stamped when they end, so that the time of a stage is the time
+    since the stamp before it (see `STAGES`). Stamps are wall clock times to be
+    comparable with the device timestamp of the inference.
+    """
+
+    __slots__ = ("stamps", "device_timestamp")
+
+    def __init__(self):
+        self.stamps: dict[str, float] = {"fetch_start": time()}
+        self.device_timestamp: Optional[float] = None
+
+    def stamp(self, stage: str):
+        self.stamps[stage] = time()
+
+    def set_device_timestamp(self, timestamp: str):
+        try:
+            self.device_timestamp = device_time(timestamp)
+        except ValueError:
+            self.device_timestamp = None
+
+    def stage_seconds(self) -> dict[str, float]:
+        """Time spent in each stage stamped so far, in seconds."""
+        return {
+            stage: self.stamps[stage] - self.stamps[previous]
+            for stage, previous in STAGES.items()
+            if stage in self.stamps and previous in self.stamps
+        }
+
+    def observe(self, *stages: str):
+        """Record the time of the given stages in the stage histograms."""
+        for stage in stages:
+            previous = STAGES[stage]
+            if stage in self.stamps and previous in self.stamps:
+                FRAME_STAGE_SECONDS.labels(stage).observe(
+                    self.stamps[stage] - self.stamps[previous]
+                )
+
+    def observe_latency(self):
+        """Record the time from the device timestamp to the last stamp."""
+        if self.device_timestamp is not None:
+            # Device and server clocks may be slightly skewed
+            latency = max(max(self.stamps.values()) - self.device_timestamp, 0)
+            FRAME_LATENCY_SECONDS.observe(latency)
+
+    def to_dict(self) -> dict[str, float]:
+        """Per-stage times, and the time since the device timestamp, in ms."""
+        trace = {
+            stage: round(seconds * 1000, 3)
+            for stage, seconds in self.stage_seconds().items()
+        }
+        if self.device_timestamp is not None:
+            latency = max(self.stamps.values()) - self.device_timestamp
+            trace["total"] = round(latency * 1000, 3)
+        return trace
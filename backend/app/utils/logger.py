@@ -13,27 +13,203 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import atexit
+import copy
+import json
 import logging.config
 import os
+import queue
+import uuid
+from collections.abc import Hashable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from datetime import timezone
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from threading import Lock
+from time import monotonic
 
 LOG_FORMAT = (
     "%(asctime)s | %(levelname)s | %(name)s | %(filename)s:%(lineno)d | %(message)s"
 )
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Seconds during which the repetitions of a rate limited record are dropped,
+# 0 disables the rate limiting
+LOG_RATE_LIMIT_INTERVAL = float(os.getenv("LOG_RATE_LIMIT_INTERVAL", 10))
+# Whether to write the logs as JSON lines, with the log context fields
+LOG_JSON = os.getenv("LOG_JSON") == "True"
+LOG_CONTEXT_FIELDS = ("request_id", "device_id", "solution_type", "frame_timestamp")
+
+_queue_listeners: list[QueueListener] = []
+# Fields attached to the records logged in the current context. Never modified,
+# replaced by a copy instead
+_log_context: ContextVar[dict[str, str]] = ContextVar("log_context", default={})
+
+
+def _with_fields(fields: dict[str, str]) -> dict[str, str]:
+    context = {**_log_context.get(), **fields}
+    return {key: value for key, value in context.items() if value is not None}
+
+
+def bind_log_context(**fields: str) -> None:
+    """
+    Attach fields to the records logged from now on in the current context, e.g.
+    by a device pipeline thread.
+
+    Args:
+        **fields (str): Fields among LOG_CONTEXT_FIELDS, None to remove one.
+    """
+    _log_context.set(_with_fields(fields))
+
+
+@contextmanager
+def log_context(**fields: str) -> Iterator[None]:
+    """Attach fields to the records logged within the block, see `bind_log_context`."""
+    token = _log_context.set(_with_fields(fields))
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class LogContextFilter(logging.Filter):
+    """Copy the log context fields to the records, in the thread logging them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            setattr(record, key, value)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON lines, with their log context fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for field in LOG_CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware attaching the ID of the request to the records it logs.
+
+    The ID is taken from the X-Request-ID header of the request, or generated, and
+    returned in the X-Request-ID header of the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        with log_context(request_id=request_id):
+            await self.app(scope, receive, send_with_request_id)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep the traceback apart from the message, for the JSON formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def rate_limited(key: Hashable) -> dict:
+    """
+    `extra` of a record logged very often, e.g. at every frame of a device, so that
+    it is logged at most once every LOG_RATE_LIMIT_INTERVAL seconds for each key.
+
+    Example:
+        logger.info("Frame of %s", device_id, extra=rate_limited(device_id))
+    """
+    return {"rate_limit_key": key}
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop the repetitions of the records marked with `rate_limited`.
+
+    A record is a repetition when logged by the same line with the same key less
+    than `interval` seconds after the last one let through. The next one let
+    through tells how many were dropped.
+    """
+
+    def __init__(self, interval: float = LOG_RATE_LIMIT_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._lock = Lock()
+        # Time of the last record let through and records dropped since
+        self._last: dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_limit_key", None)
+        if key is None or self.interval <= 0:
+            return True
+        site = (record.pathname, record.lineno, key)
+        now = monotonic()
+        with self._lock:
+            last = self._last.get(site)
+            if last is not None and now - last[0] < self.interval:
+                last[1] += 1
+                return False
+            self._last[site] = [now, 0]
+        if last is not None and last[1]:
+            record.msg = f"{record.msg} ({last[1]} similar messages dropped)"
+        return True
 
 
 def configure_logger() -> None:
     numeric_level = getattr(logging, LOG_LEVEL, logging.INFO)
+    json_formatter = {"()": JsonFormatter}
     log_config = {
         "version": 1,
         "disable_existing_loggers": False,
         "formatters": {
-            "default": {
-                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            },
-            "access": {
-                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            },
+            "default": (
+                json_formatter
+                if LOG_JSON
+                else {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"}
+            ),
+            "access": (
+                json_formatter
+                if LOG_JSON
+                else {"format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s"}
+            ),
         },
         "handlers": {
             "default": {
@@ -67,3 +243,35 @@ def configure_logger() -> None:
     }
 
     logging.config.dictConfig(log_config)
+    _queue_handlers(["", "uvicorn.error", "uvicorn.access"])
+
+
+def _queue_handlers(logger_names: list[str]) -> None:
+    """
+    Put the handlers of the given loggers behind queues, so that the threads
+    logging only enqueue their records while a listener thread writes them.
+    """
+    _stop_queue_listeners()
+    queue_handlers: dict[logging.Handler, QueueHandler] = {}
+    for name in logger_names:
+        logger = logging.getLogger(name)
+        for handler in logger.handlers:
+            if handler not in queue_handlers:
+                log_queue = queue.SimpleQueue()
+                queue_handlers[handler] = _QueueHandler(log_queue)
+                queue_handlers[handler].addFilter(RateLimitFilter())
+                queue_handlers[handler].addFilter(LogContextFilter())
+                listener = QueueListener(log_queue, handler, respect_handler_level=True)
+                listener.start()
+                _queue_listeners.append(listener)
+        logger.handlers = [queue_handlers[handler] for handler in logger.handlers]
+
+
+def _stop_queue_listeners() -> None:
+    # Writes the records still queued
+    for listener in _queue_listeners:
+        listener.stop()
+    _queue_listeners.clear()
+
+
+atexit.register(_stop_queue_listeners)
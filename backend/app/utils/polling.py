@@ -0,0 +1,77 @@
+# Copyright 2025 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterator
+from time import monotonic
+from time import sleep
+
+logger = logging.getLogger(__name__)
+
+POLL_INITIAL_DELAY = float(os.getenv("POLL_INITIAL_DELAY", 0.25))
+POLL_MAX_DELAY = float(os.getenv("POLL_MAX_DELAY", 4))
+POLL_BACKOFF_FACTOR = 2
+
+
+def backoff_delays(
+    initial_delay: float = POLL_INITIAL_DELAY, max_delay: float = POLL_MAX_DELAY
+) -> Iterator[float]:
+    """Exponentially growing delays, capped to `max_delay`."""
+    delay = initial_delay
+    while True:
+        yield delay
+        delay = min(delay * POLL_BACKOFF_FACTOR, max_delay)
+
+
+def wait_until(condition: Callable[[], bool], timeout: float, message: str):
+    """
+    Poll `condition` with exponential backoff until it is true.
+
+    Args:
+        condition (Callable[[], bool]): Condition to poll, usually a console request.
+        timeout (float): Maximum time to wait in seconds.
+        message (str): Logged while waiting.
+
+    Raises:
+        Exception: If the condition is still false after `timeout` seconds.
+    """
+    deadline = monotonic() + timeout
+    for delay in backoff_delays():
+        if condition():
+            return
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            raise Exception("Timeout while waiting for device to start.")
+        logger.info(message)
+        sleep(min(delay, remaining))
+
+
+async def wait_until_async(
+    condition: Callable[[], Awaitable[bool]], timeout: float, message: str
+):
+    """Coroutine version of `wait_until`."""
+    deadline = monotonic() + timeout
+    for delay in backoff_delays():
+        if await condition():
+            return
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            raise Exception("Timeout while waiting for device to start.")
+        logger.info(message)
+        await asyncio.sleep(min(delay, remaining))
@@ -20,6 +20,21 @@ export type StatusResponse = {
   status: string;
 };
 
+export type ProcessingJobStatus =
+  | "PENDING"
+  | "STARTING"
+  | "STREAMING"
+  | "FAILED"
+  | "CANCELLED";
+export type ProcessingJob = {
+  job_id: string;
+  device_id: string;
+  status: ProcessingJobStatus;
+  detail: string | null;
+  created_at: string;
+  updated_at: string;
+};
+
 export type SelectedRegionId = string | null;
 export type Point = {
   x: number;
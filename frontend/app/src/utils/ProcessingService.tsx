@@ -16,14 +16,18 @@
  * SPDX-License-Identifier: Apache-2.0
  */
 
-import { StatusResponse } from "../types/types";
+import { ProcessingJob, StatusResponse } from "../types/types";
 import { SolutionType } from "../stores/AppContext";
 
+const JOB_POLLING_INTERVAL_MS = 1000;
+
+// The backend starts the device in a background job, which is polled until
+// the device streams or the job fails.
 export async function startProcessing(
   deviceId: string,
   sendImageFlag: boolean,
   solutionType: SolutionType,
-): Promise<StatusResponse> {
+): Promise<ProcessingJob> {
   const url =
     import.meta.env.VITE_BACKEND_URL +
     `processing/start_processing/${deviceId}?receive_image=${sendImageFlag}&solution_type=${solutionType}`;
@@ -35,7 +39,29 @@ export async function startProcessing(
     },
   });
   if (!response.ok) {
-    throw new Error("Failed to start processing: " + response.json());
+    throw new Error("Failed to start processing: " + (await response.text()));
+  }
+  let job: ProcessingJob = await response.json();
+  while (job.status === "PENDING" || job.status === "STARTING") {
+    await new Promise((resolve) =>
+      setTimeout(resolve, JOB_POLLING_INTERVAL_MS),
+    );
+    job = await getProcessingJob(job.job_id);
+  }
+  if (job.status !== "STREAMING") {
+    throw new Error(
+      `Failed to start processing: job ${job.status.toLowerCase()}` +
+        (job.detail ? `, ${job.detail}` : ""),
+    );
+  }
+  return job;
+}
+
+export async function getProcessingJob(jobId: string): Promise<ProcessingJob> {
+  const url = import.meta.env.VITE_BACKEND_URL + "processing/jobs/" + jobId;
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error("Failed to get processing job " + jobId);
   }
   return await response.json();
 }